@@ -1,10 +1,7 @@
 import streamlit as st
-from PIL import Image
+from pathlib import Path
 
-# Load image (ensure the path is correct relative to your script)
-image = Image.open("public value metric dashboard.jpg")
-
-st.set_page_config(page_title="Lumina Challenge Submission", layout="wide")
+from lumina.dataset import warm_up
 
 # --- PAGE CONFIG ---
 st.set_page_config(
@@ -13,11 +10,31 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Parse the survey files while the report is being read; the data pages
+# pick up the loaded dataset instead of starting their own load.
+warm_up()
+
+HEADER_IMAGE = Path(__file__).resolve().parent / "public value metric dashboard.jpg"
+HEADER_WIDTH = 350  # displayed width in pixels
+
+@st.cache_resource
+def load_header_image(path, width):
+    # Decoded and downsized once per process, at twice the displayed width
+    # so it stays sharp on high-DPI screens.
+    import io
+    from PIL import Image
+
+    with Image.open(path) as image:
+        image.thumbnail((2 * width, image.height))
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=85, optimize=True)
+    return buffer.getvalue()
+
 # Create two columns: one for the header, one for the image
 col1, col2 = st.columns([1, 4])  # Adjust ratio as needed (text:image)
 
 with col1:
-    st.image(image, width=350)  # Set desired pixel width here
+    st.image(load_header_image(str(HEADER_IMAGE), HEADER_WIDTH), width=HEADER_WIDTH)
 with col2:
     # --- REPORT PAGE ---
     st.title("🎓 Public Value Dashboard: Quantifying Postsecondary Education's Returns for Health, Community, Safety")
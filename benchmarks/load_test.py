@@ -0,0 +1,361 @@
+"""Concurrent sessions against one replica: rerun latency, throughput and memory.
+
+For every concurrency level a fresh ``streamlit run Homepage.py`` server is
+started locally and driven over its websocket the way browsers drive it:
+each simulated user is a thread with its own connection, so its own
+Streamlit session, sending the same ``rerun_script`` messages the frontend
+sends and waiting for the rerun to finish. Every user follows one click
+path: page 1 loads, page 2 gets a second year, page 3 changes year and then
+indicator (a fragment-only rerun, as in the browser), page 4 adds years and
+narrows the state and education filters.
+
+One user walks the path alone first so every cache is warm, then all users
+start together and stay connected until the last one is done. The table
+lists p50, p95 and p99 of the time from sending a rerun to its
+``script_finished``, reruns per second, and the server's resident memory
+over the warmed-up baseline, in total and per user::
+
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --sessions 1 5 10 20 --iterations 3 --think 1
+    python benchmarks/load_test.py --root /path/to/other/checkout --output load.json
+
+The clients run on the same machine as the server, and browser rendering
+is not included: this measures the work a replica does per user. The
+clients need ``websockets``, listed in ``benchmarks/requirements.txt``::
+
+    pip install -r benchmarks/requirements.txt
+"""
+import argparse
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from contextlib import ExitStack
+from pathlib import Path
+
+# (step, page, [(widget label, value)]); one rerun per page load and per change.
+# Values are the option labels the browser sends, or a function of the options.
+CLICK_PATH = [
+    ("page 1 load", "Raw_Data_Validation", []),
+    ("page 2 years", "Datasets", [("📅 Select Year(s)", ["2023", "2022"])]),
+    ("page 3 indicator", "Visualizations_(Map_+_Regression)", [
+        ("Select Year", "2022"),
+        ("Select Health/Lifestyle Indicator", "    🦴 Diagnosed with Arthritis"),
+    ]),
+    ("page 4 filters", "Visualizations_(Comparison)", [
+        ("📅 Choose Year(s)", ["2023", "2022", "2021"]),
+        ("🌎 Filter by States", lambda options: options[:10]),
+        ("🎓 Filter by Education Level", lambda options: options[:3]),
+    ]),
+]
+
+
+def browser_value(kind, widget):
+    """The value the browser reports for a widget the user has not touched, or ``None``."""
+    if kind == "selectbox":
+        if widget.set_value:
+            return widget.raw_value
+        return widget.options[widget.default] if widget.HasField("default") else None
+    if kind == "multiselect":
+        return list(widget.raw_values) if widget.set_value else [widget.options[i] for i in widget.default]
+    if kind == "checkbox":
+        return widget.value if widget.set_value else widget.default
+    if kind == "number_input":
+        value = widget.value if widget.set_value else (widget.default if widget.HasField("default") else None)
+        return int(value) if value is not None and widget.data_type == widget.INT else value
+    # Buttons are triggers, and no other kind is on the click path
+    return None
+
+
+def widget_state(kind, widget_id, value):
+    from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+    state = WidgetState(id=widget_id)
+    if kind == "multiselect":
+        state.string_array_value.data[:] = value
+    elif kind == "checkbox":
+        state.bool_value = value
+    elif kind == "number_input":
+        if isinstance(value, int):
+            state.int_value = value
+        else:
+            state.double_value = value
+    else:
+        state.string_value = value
+    return state
+
+
+class Session:
+    """One browser tab: a websocket to the server and the widgets on its current page."""
+
+    def __init__(self, url, timeout):
+        from websockets.sync.client import connect
+
+        self.timeout = timeout
+        self._stack = ExitStack()
+        self.websocket = self._stack.enter_context(
+            connect(url, subprotocols=["streamlit"], max_size=None, open_timeout=timeout)
+        )
+        self.widgets = {}     # label -> [proto type, widget id, fragment id, options, value]
+        self.changed = {}     # label -> value the user picked on the current page
+
+    def close(self):
+        self._stack.close()
+
+    def open_page(self, page):
+        self.widgets, self.changed = {}, {}
+        return self.rerun(page)
+
+    def change(self, page, label, value):
+        widget = self.widgets[label]
+        if callable(value):
+            value = value(widget[3])
+        widget[4] = self.changed[label] = value
+        # A widget inside a fragment reruns only that fragment, as in the browser
+        return self.rerun(page, widget[2])
+
+    def rerun(self, page, fragment_id=""):
+        """Send a rerun of ``page`` and wait for it to finish; returns ``(seconds, error)``."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        # Like the browser, report every widget on the page, touched or not
+        msg = BackMsg()
+        msg.rerun_script.page_name = page
+        msg.rerun_script.fragment_id = fragment_id
+        msg.rerun_script.widget_states.widgets.extend(
+            widget_state(kind, widget_id, value)
+            for kind, widget_id, _, _, value in self.widgets.values() if value is not None
+        )
+        start = time.perf_counter()
+        self.websocket.send(msg.SerializeToString())
+        error = None
+        seen = {}
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(self.websocket.recv(timeout=self.timeout))
+            if forward.HasField("delta") and forward.delta.HasField("new_element"):
+                element = forward.delta.new_element
+                kind = element.WhichOneof("type")
+                if kind == "exception":
+                    error = f"{element.exception.type}: {element.exception.message}"
+                widget = getattr(element, kind)
+                if getattr(widget, "id", "") and hasattr(widget, "label"):
+                    value = self.changed.get(widget.label, browser_value(kind, widget))
+                    seen[widget.label] = [kind, widget.id, forward.delta.fragment_id,
+                                          list(getattr(widget, "options", [])), value]
+            elif forward.HasField("script_finished"):
+                # A callback's st.rerun ends the first run early; the rerun it asked for follows
+                if forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    break
+        seconds = time.perf_counter() - start
+        # A fragment run redraws only its own widgets; a full run redraws the page
+        if fragment_id:
+            self.widgets.update(seen)
+        else:
+            self.widgets = seen
+        return seconds, error
+
+
+def walk(session, think, timings, errors):
+    """Run the click path once; appends ``(step, seconds)`` per rerun."""
+    for step, page, changes in CLICK_PATH:
+        for change in [None, *changes]:
+            seconds, error = session.open_page(page) if change is None else session.change(page, *change)
+            timings.append((step, seconds))
+            if error:
+                errors.append(f"{step}: {error}")
+            if think:
+                time.sleep(think)
+
+
+# --- Server ---
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(root, port, timeout=120):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "Homepage.py", "--server.headless", "true",
+         "--server.port", str(port), "--server.address", "127.0.0.1", "--server.fileWatcherType", "none",
+         "--browser.gatherUsageStats", "false", "--logger.level", "error"],
+        cwd=root, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited:\n{server.stderr.read()[-2000:]}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=2):
+                return server
+        except OSError:
+            time.sleep(0.25)
+    server.kill()
+    raise RuntimeError(f"Server not healthy after {timeout} s")
+
+
+def rss_bytes(pid):
+    """Resident memory of process ``pid``, from ``/proc``."""
+    with open(f"/proc/{pid}/status", encoding="ascii") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    raise LookupError(f"No VmRSS for {pid}")
+
+
+# --- Levels ---
+
+def run_level(root, users, iterations, think, timeout):
+    """Warm up a fresh server, then run ``users`` concurrent users against it."""
+    port = free_port()
+    server = start_server(root, port)
+    url = f"ws://127.0.0.1:{port}/_stcore/stream"
+    try:
+        start = time.perf_counter()
+        warm_up = Session(url, timeout)
+        warm_up_errors = []
+        walk(warm_up, 0, [], warm_up_errors)
+        warm_up.close()
+        warm_up_s = time.perf_counter() - start
+        baseline = rss_bytes(server.pid)
+
+        timings, errors, sessions = [], list(warm_up_errors), []
+        peak = [baseline]
+        ready = threading.Barrier(users)
+
+        def user():
+            try:
+                session = Session(url, timeout)
+                sessions.append(session)
+                ready.wait()
+                for _ in range(iterations):
+                    walk(session, think, timings, errors)
+                    peak[0] = max(peak[0], rss_bytes(server.pid))
+            except Exception as exc:  # Reported with the results
+                errors.append(repr(exc))
+                ready.abort()
+
+        threads = [threading.Thread(target=user, name=f"user-{i}") for i in range(users)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+        # Measured while every session is still open
+        held = rss_bytes(server.pid)
+        for session in sessions:
+            session.close()
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    return {
+        "users": users,
+        "warm_up_s": warm_up_s,
+        "wall_s": wall,
+        "timings": timings,
+        "baseline_bytes": baseline,
+        "held_bytes": held,
+        "peak_bytes": max(peak[0], held),
+        "errors": errors,
+    }
+
+
+def percentiles(seconds):
+    """p50, p95 and p99 of ``seconds``, in milliseconds."""
+    if len(seconds) < 2:
+        return [seconds[0] * 1000] * 3 if seconds else [float("nan")] * 3
+    cuts = statistics.quantiles(seconds, n=100, method="inclusive")
+    return [cuts[49] * 1000, cuts[94] * 1000, cuts[98] * 1000]
+
+
+def summarize(level):
+    seconds = [s for _, s in level["timings"]]
+    p50, p95, p99 = percentiles(seconds)
+    growth = level["held_bytes"] - level["baseline_bytes"]
+    return {
+        "users": level["users"],
+        "reruns": len(seconds),
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "reruns_per_s": len(seconds) / level["wall_s"] if level["wall_s"] else 0.0,
+        "wall_s": level["wall_s"],
+        "warm_up_s": level["warm_up_s"],
+        "baseline_mb": level["baseline_bytes"] / 2**20,
+        "growth_mb": growth / 2**20,
+        "mb_per_user": growth / 2**20 / level["users"],
+        "peak_mb": level["peak_bytes"] / 2**20,
+        "steps": {
+            step: dict(zip(["p50_ms", "p95_ms", "p99_ms"], percentiles([s for name, s in level["timings"] if name == step])))
+            for step, _, _ in CLICK_PATH
+        },
+        "errors": level["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root", type=Path, default=Path(__file__).resolve().parents[1],
+                        help="checkout to measure (default: this one)")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="concurrent users per level (default: 1 2 4 8)")
+    parser.add_argument("--iterations", type=int, default=2, help="times each user walks the click path")
+    parser.add_argument("--think", type=float, default=0.0,
+                        help="seconds a user waits after each rerun (default: 0, as many reruns as possible)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="seconds to wait for one rerun")
+    parser.add_argument("--p95-budget", type=float, default=1000.0,
+                        help="p95 rerun latency in ms a level must stay under to count as handled")
+    parser.add_argument("--output", type=Path, help="also write the results as JSON")
+    args = parser.parse_args()
+    root = args.root.resolve()
+    # Checked before any server starts; Session imports the client itself
+    try:
+        import websockets.sync.client
+    except ImportError:
+        sys.exit("load_test.py needs websockets 12 or newer: pip install -r benchmarks/requirements.txt")
+
+    print(f"{'users':>5} {'reruns':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'reruns/s':>9} "
+          f"{'base MB':>8} {'+MB':>7} {'MB/user':>8} {'peak MB':>8}")
+    results = []
+    for users in args.sessions:
+        result = summarize(run_level(root, users, args.iterations, args.think, args.timeout))
+        results.append(result)
+        print(f"{users:>5} {result['reruns']:>7} {result['p50_ms']:>8.0f} {result['p95_ms']:>8.0f} "
+              f"{result['p99_ms']:>8.0f} {result['reruns_per_s']:>9.2f} {result['baseline_mb']:>8.0f} "
+              f"{result['growth_mb']:>7.1f} {result['mb_per_user']:>8.2f} {result['peak_mb']:>8.0f}", flush=True)
+        for error in result["errors"]:
+            print(f"      error: {error}")
+
+    print("\nper step, p50 / p95 ms:")
+    for step, _, _ in CLICK_PATH:
+        print(f"  {step:<18} " + "  ".join(
+            f"{r['users']:>3}u {r['steps'][step]['p50_ms']:>5.0f} / {r['steps'][step]['p95_ms']:<5.0f}" for r in results
+        ))
+
+    if len(results) > 1:
+        fit = statistics.linear_regression([r["users"] for r in results], [r["growth_mb"] for r in results])
+        print(f"\nmemory per added user: {fit.slope:.2f} MB")
+    handled = [r["users"] for r in results if not r["errors"] and r["p95_ms"] <= args.p95_budget]
+    if handled:
+        print(f"most users with p95 under {args.p95_budget:.0f} ms: {max(handled)}")
+    else:
+        print(f"no level kept p95 under {args.p95_budget:.0f} ms")
+
+    if args.output:
+        args.output.write_text(json.dumps({
+            "sessions": args.sessions, "iterations": args.iterations, "think_s": args.think,
+            "p95_budget_ms": args.p95_budget, "levels": results,
+        }, indent=1), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Bytes each page sends to the browser per rerun, by element type.
+
+Every scenario runs in a fresh ``AppTest`` session; the serialized size of
+every element the rerun produced is summed, split into figures, tables and
+everything else. Run it against any checkout to compare before and after::
+
+    python benchmarks/payload.py
+    python benchmarks/payload.py --root /path/to/other/checkout
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from rerun_latency import find_widget, set_value
+
+# (name, page glob, [(widget kind, label, value)])
+SCENARIOS = [
+    ("page 3 default", "3_*.py", []),
+    ("page 3 year slider maps", "3_*.py", [("toggle", "Year slider inside the maps", True)]),
+    ("page 4 default", "4_*.py", []),
+    ("page 4 five questions x 5 years", "4_*.py", [
+        ("multiselect", "📋 Data Categories", [
+            "🤝 Formal Volunteer", "💸 Charity Donations", "🦴 Diagnosed with Arthritis",
+            "😤 Diagnosed with Asthma", "🧠 Diagnosed with Depression",
+        ]),
+        ("multiselect", "📅 Choose Year(s)", [2023, 2022, 2021, 2020, 2019]),
+    ]),
+    ("page 4 same, standard rendering", "4_*.py", [
+        ("multiselect", "📋 Data Categories", [
+            "🤝 Formal Volunteer", "💸 Charity Donations", "🦴 Diagnosed with Arthritis",
+            "😤 Diagnosed with Asthma", "🧠 Diagnosed with Depression",
+        ]),
+        ("multiselect", "📅 Choose Year(s)", [2023, 2022, 2021, 2020, 2019]),
+        ("selectbox", "⚡ Rendering", "Standard"),
+    ]),
+    ("page 5 default", "5_*.py", []),
+    ("page 6 default", "6_*.py", []),
+]
+
+KINDS = {"plotly_chart": "figures", "dataframe": "tables"}
+
+
+def payload(at):
+    from streamlit.testing.v1.element_tree import Block
+
+    sizes = {"figures": 0, "tables": 0, "other": 0}
+    for node in at._tree:
+        if isinstance(node, Block) or getattr(node, "proto", None) is None:
+            continue
+        sizes[KINDS.get(node.type, "other")] += node.proto.ByteSize()
+    return sizes
+
+
+def measure(page, changes):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(page), default_timeout=300)
+    at.run()
+    for kind, label, value in changes:
+        set_value(find_widget(at, kind, label), value)
+        at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return payload(at)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root", type=Path, default=Path(__file__).resolve().parents[1],
+                        help="checkout to measure (default: this one)")
+    args = parser.parse_args()
+
+    from streamlit.logger import set_log_level
+    set_log_level("error")
+
+    root = args.root.resolve()
+    os.chdir(root)
+    sys.path.insert(0, str(root))
+
+    print(f"{'scenario':<34} {'figures KB':>11} {'tables KB':>10} {'other KB':>9} {'total KB':>9}")
+    for name, page_glob, changes in SCENARIOS:
+        page = next((root / "pages").glob(page_glob))
+        sizes = measure(page, changes)
+        total = sum(sizes.values())
+        print(f"{name:<34} {sizes['figures'] / 1024:>11.1f} {sizes['tables'] / 1024:>10.1f} "
+              f"{sizes['other'] / 1024:>9.1f} {total / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Rerun latency of the page 3 and page 4 widgets.
+
+Every interaction is replayed with Streamlit's ``AppTest``: a fresh session
+runs the page in full, one widget is moved off its default and the rerun it
+triggers is timed.
+Besides the wall time, the script counts the elements that rerun sent and
+their serialized size, which shows whether only the dependent panels were
+redrawn. Run it against any checkout to compare before and after::
+
+    python benchmarks/rerun_latency.py
+    python benchmarks/rerun_latency.py --root /path/to/other/checkout --repeat 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# (page glob, widget kind, label, non-default value)
+INTERACTIONS = [
+    ("3_*.py", "selectbox", "Select Health/Lifestyle Indicator", "    🦴 Diagnosed with Arthritis"),
+    ("3_*.py", "selectbox", "Select Education Group", "Less than College"),
+    ("3_*.py", "selectbox", "Weights", "Sample size (n)"),
+    ("3_*.py", "checkbox", "Robust (HC1) standard errors", False),
+    ("4_*.py", "multiselect", "📅 Choose Year(s)", [2023, 2022]),
+    ("4_*.py", "selectbox", "📊 Choose Chart Type", "Line"),
+    ("4_*.py", "selectbox", "📊 X-Axis", "Education Level"),
+]
+
+
+def find_widget(at, kind, label):
+    for widget in getattr(at, kind):
+        if widget.label == label:
+            return widget
+    raise LookupError(f"No {kind} labelled {label!r}")
+
+
+def rerun_payload(at):
+    from streamlit.testing.v1.element_tree import Block
+
+    elements = [node for node in at._tree if not isinstance(node, Block)]
+    size = sum(node.proto.ByteSize() for node in elements if getattr(node, "proto", None) is not None)
+    return len(elements), size
+
+
+def set_value(widget, value):
+    if hasattr(widget, "set_value"):
+        return widget.set_value(value)
+    return widget.select(value)
+
+
+def measure(page, kind, label, value, repeat):
+    from streamlit.testing.v1 import AppTest
+
+    timings = []
+    for _ in range(repeat):
+        # A new session each time: after a fragment-only rerun the element
+        # tree no longer holds the widgets outside the fragment, so reusing
+        # the session would silently reset them. Caches stay warm.
+        at = AppTest.from_file(str(page), default_timeout=300)
+        at.run()
+        set_value(find_widget(at, kind, label), value)
+        start = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+    elements, size = rerun_payload(at)
+    return {
+        "median_ms": statistics.median(timings) * 1000,
+        "max_ms": max(timings) * 1000,
+        "elements": elements,
+        "bytes": size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root", type=Path, default=Path(__file__).resolve().parents[1],
+                        help="checkout to measure (default: this one)")
+    parser.add_argument("--repeat", type=int, default=6)
+    args = parser.parse_args()
+
+    from streamlit.logger import set_log_level
+    set_log_level("error")
+
+    root = args.root.resolve()
+    os.chdir(root)
+    sys.path.insert(0, str(root))
+
+    print(f"{'page':<6} {'widget':<36} {'median ms':>10} {'max ms':>9} {'elements':>9} {'bytes':>10}")
+    for page_glob, kind, label, value in INTERACTIONS:
+        page = next((root / "pages").glob(page_glob))
+        result = measure(page, kind, label, value, args.repeat)
+        print(f"{page.name[:1]:<6} {label[:36]:<36} {result['median_ms']:>10.1f} {result['max_ms']:>9.1f} "
+              f"{result['elements']:>9} {result['bytes']:>10,}")
+
+
+if __name__ == "__main__":
+    main()
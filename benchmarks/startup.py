@@ -0,0 +1,79 @@
+"""Time to first render of every page in a fresh Python process.
+
+Each page is run once with Streamlit's ``AppTest`` in a new interpreter, as
+a freshly started replica would. The table splits the time into importing
+Streamlit, running the page script (its own imports plus the first render)
+and the whole process including interpreter start-up::
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --cold-store   # also rebuild the compiled store first
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Runs in the child process; prints one JSON line.
+CHILD = """
+import json, os, sys, time
+start = time.perf_counter()
+from streamlit.logger import set_log_level
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+set_log_level("error")
+root, page = sys.argv[1], sys.argv[2]
+os.chdir(root)
+sys.path.insert(0, root)
+at = AppTest.from_file(page, default_timeout=600)
+at.run()
+done = time.perf_counter()
+print(json.dumps({
+    "streamlit_import_s": imported - start,
+    "first_run_s": done - imported,
+    "modules": len(sys.modules),
+    "exceptions": [str(e.value) for e in at.exception],
+}))
+"""
+
+
+def pages(root):
+    return [root / "Homepage.py"] + sorted((root / "pages").glob("*.py"))
+
+
+def run_page(root, page, cold_store):
+    if cold_store:
+        (root / "pages" / "data" / "dataset.arrow").unlink(missing_ok=True)
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, str(root), str(page)],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process_s"] = time.perf_counter() - start
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root", type=Path, default=Path(__file__).resolve().parents[1],
+                        help="checkout to measure (default: this one)")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh processes per page; the median is shown")
+    parser.add_argument("--cold-store", action="store_true",
+                        help="delete pages/data/dataset.arrow before each run so it is rebuilt from the CSVs")
+    args = parser.parse_args()
+    root = args.root.resolve()
+
+    print(f"{'page':<44} {'streamlit ms':>13} {'first run ms':>13} {'process ms':>11} {'modules':>8}")
+    for page in pages(root):
+        results = [run_page(root, page, args.cold_store) for _ in range(args.repeat)]
+        median = lambda key: statistics.median(r[key] for r in results) * 1000
+        errors = results[-1]["exceptions"]
+        print(f"{page.name[:44]:<44} {median('streamlit_import_s'):>13.0f} {median('first_run_s'):>13.0f} "
+              f"{median('process_s'):>11.0f} {results[-1]['modules']:>8}" + (f"  ERROR {errors[0]}" if errors else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""Benchmark suite: parser, bulk load, page 3 and page 4 paths, page reruns.
+
+For every scale a synthetic data tree is written with
+:mod:`synthetic` (scale 1 is an exact copy of ``pages/data``) and measured
+in a fresh process pointed at it through ``LUMINA_DATA_DIR``:
+
+- ``parser``: reading every CSV and running ``parse_blocked_education_df``
+  plus ``to_typed_frame`` on it
+- ``bulk_load``: page 1's ``bulk_load`` with no store (build) and again
+  with the store in place (memory-map)
+- ``page3``: the batched correlations, WLS, education shares and the
+  single-year and animated maps
+- ``page4``: selecting every question x year, filtering, the same
+  selection through both query backends and building the large-data figure
+- ``apptest``: first render of each page and the widget reruns from
+  ``rerun_latency.py``, driven headless through ``AppTest``
+
+Results are written as JSON. Pass ``--baseline`` with an earlier file to
+list every timing that got slower than ``--tolerance`` and exit non-zero::
+
+    python benchmarks/suite.py --scales 1 10 --output bench.json
+    python benchmarks/suite.py --scales 1 10 --baseline bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def timed(fn, repeat=1):
+    """``(median seconds, last result)`` of calling ``fn`` ``repeat`` times."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def bench_parser(data_dir):
+    from lumina.catalog import iter_source_files
+    from lumina.parsing import parse_blocked_education_df, to_typed_frame
+    from lumina.store import read_source_csv
+
+    read_s = parse_s = 0.0
+    files = rows = 0
+    for _, _, path in iter_source_files(data_dir):
+        start = time.perf_counter()
+        raw = read_source_csv(path)
+        read = time.perf_counter()
+        typed = to_typed_frame(parse_blocked_education_df(raw))
+        read_s += read - start
+        parse_s += time.perf_counter() - read
+        files += 1
+        rows += len(typed)
+    return {"files": files, "rows": rows, "read_s": read_s, "parse_s": parse_s,
+            "rows_per_s": rows / parse_s if parse_s else None}
+
+
+def bench_bulk_load(data_dir):
+    from lumina.catalog import QUESTION_TO_FILENAME, YEARS
+    from lumina.loader import bulk_load
+    from lumina.store import STORE_PATH
+
+    STORE_PATH.unlink(missing_ok=True)
+    cold_s, _ = timed(lambda: bulk_load(QUESTION_TO_FILENAME, YEARS))
+    warm_s, _ = timed(lambda: bulk_load(QUESTION_TO_FILENAME, YEARS), repeat=3)
+    return {"cold_s": cold_s, "warm_s": warm_s, "store_bytes": STORE_PATH.stat().st_size}
+
+
+def bench_page3():
+    from lumina.analysis import education_shares, indicator_correlations
+    from lumina.catalog import QUESTION_TO_FILENAME
+    from lumina.figures import animated_indicator_map, indicator_map, with_abbrev
+    from lumina.regression import indicator_wls
+    from lumina.store import load_store
+
+    store_df, _ = load_store()
+    filename = QUESTION_TO_FILENAME["    🦴 Diagnosed with Arthritis"]
+    one_year = store_df[(store_df["Question"] == filename) & (store_df["Year"] == 2023)]
+    return {
+        "store_rows": len(store_df),
+        "education_shares_s": timed(lambda: education_shares(store_df), repeat=3)[0],
+        "correlations_s": timed(lambda: indicator_correlations(store_df, QUESTION_TO_FILENAME), repeat=3)[0],
+        "wls_s": timed(lambda: indicator_wls(store_df, QUESTION_TO_FILENAME), repeat=3)[0],
+        "indicator_map_s": timed(lambda: indicator_map(with_abbrev(one_year), "Arthritis"), repeat=3)[0],
+        "animated_map_s": timed(lambda: animated_indicator_map(store_df, filename, "Arthritis"))[0],
+    }
+
+
+def bench_page4():
+    from lumina.catalog import QUESTION_TO_FILENAME, YEARS
+    from lumina.comparison import consolidated_figure, figure_report, query_selection
+    from lumina.loader import bulk_load
+    from lumina.query import PandasBackend, SQLiteBackend
+    from lumina.store import load_store, store_fingerprint
+
+    loaded_data = bulk_load(QUESTION_TO_FILENAME, YEARS)
+    questions = list(loaded_data)
+    store_df, _ = load_store()
+    pandas_backend = PandasBackend(store_df)
+    combine_s, df = timed(lambda: query_selection(pandas_backend, questions, YEARS), repeat=3)
+    states = sorted(df["State"].unique())[::2]
+    filter_s, filtered = timed(lambda: df[df["State"].isin(states)], repeat=3)
+
+    # The filtered selection through both query backends, plus a one-question one
+    sqlite_build_s, sqlite_backend = timed(
+        lambda: SQLiteBackend(store_df, store_fingerprint(), Path(tempfile.mkdtemp()) / "query.sqlite"))
+    queries = {}
+    for name, backend in (("pandas", pandas_backend), ("sqlite", sqlite_backend)):
+        queries[f"query_{name}_s"] = timed(lambda: query_selection(backend, questions, YEARS, states), repeat=3)[0]
+        queries[f"query_one_{name}_s"] = timed(
+            lambda: query_selection(backend, questions[:1], YEARS[-1:], states), repeat=3)[0]
+
+    colors = filtered["Question"].astype("category").cat.codes.map(lambda code: f"#{code * 7 % 256:02x}4080")
+    figure_s, fig = timed(lambda: consolidated_figure(
+        filtered, "Scatter", "State", "Percentage", colors, filtered["Question"], "benchmark"))
+    report = figure_report(fig, figure_s)
+    return {"rows": len(df), "filtered_rows": len(filtered), "combine_s": combine_s, "filter_s": filter_s,
+            "sqlite_build_s": sqlite_build_s, **queries,
+            "figure_s": figure_s, "serialize_s": report["serialize_ms"] / 1000,
+            "payload_bytes": report["payload_bytes"], "traces": report["traces"]}
+
+
+def bench_apptest(repeat):
+    from streamlit.testing.v1 import AppTest
+
+    from rerun_latency import INTERACTIONS, measure
+
+    first_render = {}
+    for page in [ROOT / "Homepage.py"] + sorted((ROOT / "pages").glob("*.py")):
+        at = AppTest.from_file(str(page), default_timeout=600)
+        seconds, _ = timed(at.run)
+        first_render[page.stem] = {"s": seconds, "exceptions": [str(e.value) for e in at.exception]}
+    reruns = {}
+    for page_glob, kind, label, value in INTERACTIONS:
+        page = next((ROOT / "pages").glob(page_glob))
+        result = measure(page, kind, label, value, repeat)
+        reruns[f"{page.name[:1]} {label.strip()}"] = {"median_s": result["median_ms"] / 1000,
+                                                     "elements": result["elements"], "bytes": result["bytes"]}
+    return {"first_render": first_render, "reruns": reruns}
+
+
+def run_child(data_dir, repeat):
+    # Runs with LUMINA_DATA_DIR already set, before lumina is imported.
+    from streamlit.logger import set_log_level
+    set_log_level("error")
+    os.chdir(ROOT)
+    sys.path.insert(0, str(ROOT))
+    return {
+        "parser": bench_parser(Path(data_dir)),
+        "bulk_load": bench_bulk_load(Path(data_dir)),
+        "page3": bench_page3(),
+        "page4": bench_page4(),
+        "apptest": bench_apptest(repeat),
+    }
+
+
+def measure_scale(scale, workdir, repeat):
+    from synthetic import generate
+
+    data_dir = workdir / f"{scale}x"
+    marker = data_dir / ".complete"
+    if not marker.exists():
+        start = time.perf_counter()
+        files = generate(data_dir, scale)
+        marker.write_text(json.dumps({"files": files, "seconds": time.perf_counter() - start}))
+    env = dict(os.environ, LUMINA_DATA_DIR=str(data_dir))
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", str(data_dir), "--repeat", str(repeat)],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def metadata():
+    import numpy
+    import pandas
+    import streamlit
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "versions": {"pandas": pandas.__version__, "numpy": numpy.__version__, "streamlit": streamlit.__version__},
+    }
+
+
+def timings(results, prefix=""):
+    """Flatten to ``{"10x.page3.wls_s": seconds, ...}`` for every timing key."""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(timings(value, f"{name}."))
+        elif isinstance(value, (int, float)) and (key.endswith("_s") or key == "s"):
+            flat[name] = value
+    return flat
+
+
+def regressions(current, baseline, tolerance):
+    old = timings(baseline["results"])
+    return [
+        (name, old[name], seconds) for name, seconds in timings(current["results"]).items()
+        if name in old and old[name] > 0 and seconds > old[name] * tolerance
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--repeat", type=int, default=3, help="samples per AppTest rerun")
+    parser.add_argument("--workdir", type=Path, default=Path(tempfile.gettempdir()) / "lumina-bench",
+                        help="where synthetic trees are written and reused")
+    parser.add_argument("--output", type=Path, help="write the JSON results here (default: stdout)")
+    parser.add_argument("--baseline", type=Path, help="earlier results to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="slowdown ratio reported as a regression")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.repeat)))
+        return
+
+    results = {"meta": metadata(), "results": {}}
+    for scale in args.scales:
+        print(f"Measuring {scale}x ...", file=sys.stderr)
+        results["results"][f"{scale}x"] = measure_scale(scale, args.workdir, args.repeat)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        slower = regressions(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for name, before, after in slower:
+            print(f"REGRESSION {name}: {before:.3f}s -> {after:.3f}s", file=sys.stderr)
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
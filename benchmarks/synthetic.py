@@ -0,0 +1,128 @@
+"""Write scaled-up synthetic copies of the ``pages/data`` CSV tree.
+
+Every real file is used as a template and rewritten in the same blocked
+``Location,n,Percentage,95% CI`` layout, with the original quirks kept
+("2,098" counts, "*" suppressed cells, "**" footnotes). A scale multiplies
+the tree along three axes:
+
+- indicators: extra copies of every question, ``<name> (synthetic 2)`` ...
+- locations: extra copies of every state block, ``<state> #2`` ...
+- years: extra copies of every year shifted back by 10, 20, ... years
+
+Copy 1 of each axis keeps the real names, so the pages still find their
+indicators. Percentages and CIs of every copy are jittered with a seeded
+generator, so the output is the same on every run::
+
+    python benchmarks/synthetic.py 10 /tmp/lumina-10x
+    LUMINA_DATA_DIR=/tmp/lumina-10x streamlit run Homepage.py
+"""
+import argparse
+import csv
+import re
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+SOURCE_DIR = ROOT / "pages" / "data"
+
+# scale -> (indicator copies, location copies, year copies)
+SCALES = {
+    1: (1, 1, 1),
+    10: (5, 2, 1),
+    100: (10, 5, 2),
+}
+
+HEADER = ["Location", "n", "Percentage", "95% CI"]
+NUMBER = re.compile(r"^(\d+(?:\.\d+)?)(\**)$")
+
+
+def source_files(source_dir=SOURCE_DIR):
+    for path in sorted(source_dir.rglob("*.csv")):
+        stem, _, year = path.stem.rpartition("_")
+        if stem and year.isdigit():
+            yield path, stem, int(year)
+
+
+def read_blocks(path):
+    """``[(header_row, [level_rows])]`` in file order; rows are raw string lists."""
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = [row + [""] * (4 - len(row)) for row in csv.reader(f)][1:]
+    blocks = []
+    for row in rows:
+        if not row[1] and not row[2]:
+            blocks.append((row, []))
+        elif blocks:
+            blocks[-1][1].append(row)
+    return blocks
+
+
+def _jitter(row, delta):
+    location, n, percentage, ci = row[:4]
+    match = NUMBER.match(percentage)
+    if not match:
+        return [location, n, percentage, ci]
+    value = min(max(float(match.group(1)) + delta, 0.0), 100.0)
+    percentage = f"{value:.1f}{match.group(2)}"
+    if "-" in ci:
+        try:
+            low, high = (float(v) for v in ci.split("-", 1))
+            ci = f"{min(max(low + delta, 0.0), 100.0):.1f}-{min(max(high + delta, 0.0), 100.0):.1f}"
+        except ValueError:
+            pass
+    return [location, n, percentage, ci]
+
+
+def write_copy(blocks, out_path, location_copies, rng, jitter):
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for copy in range(1, location_copies + 1):
+            for header, rows in blocks:
+                name = header[0] if copy == 1 else f"{header[0]} #{copy}"
+                writer.writerow([name, "", "", ""])
+                deltas = rng.normal(0, 1.5, len(rows)) if jitter else np.zeros(len(rows))
+                for row, delta in zip(rows, deltas):
+                    writer.writerow(_jitter(row, delta))
+
+
+def generate(out_dir, scale, source_dir=SOURCE_DIR, seed=0):
+    """Write the synthetic tree for ``scale`` (a :data:`SCALES` key) to ``out_dir``.
+
+    Returns the number of CSV files written.
+    """
+    indicator_copies, location_copies, year_copies = SCALES[scale]
+    out_dir = Path(out_dir)
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    rng = np.random.default_rng(seed)
+
+    written = 0
+    for path, stem, year in source_files(source_dir):
+        blocks = read_blocks(path)
+        folder = path.parent.relative_to(source_dir)
+        for indicator in range(1, indicator_copies + 1):
+            name = stem if indicator == 1 else f"{stem} (synthetic {indicator})"
+            for shift in range(year_copies):
+                out_path = out_dir / folder / f"{name}_{year - 10 * shift}.csv"
+                # The scale-1 tree is an exact copy of the real data
+                write_copy(blocks, out_path, location_copies, rng, jitter=scale != 1)
+                written += 1
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scale", type=int, choices=sorted(SCALES))
+    parser.add_argument("out_dir", type=Path)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    written = generate(args.out_dir, args.scale, seed=args.seed)
+    print(f"Wrote {written} files to {args.out_dir}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Batched indicator-vs-education statistics for the Map + Regression page.
+
+Page 3 pairs every (state, education level) row of a health indicator with
+the state's share of adults in the selected education group and fits one
+regression per view. The functions here build the same pairs for every
+indicator, year and education group at once and reduce them with grouped
+sums, so a full sweep is a handful of array operations.
+"""
+import numpy as np
+import pandas as pd
+from scipy import special
+
+from lumina.geo import US_STATE_ABBREV
+
+EDUCATION_QUESTION = "overall education/education level"
+EDUCATION_GROUPS = ["College+", "Less than College"]
+LESS_THAN_COLLEGE_LEVELS = ["Less than H.S.", "H.S. or G.E.D.", "Some post-H.S."]
+
+
+def education_shares(store_df):
+    """Long frame of ``Year, State, Education Group, Education_Percentage``.
+
+    "College+" is taken as reported; "Less than College" is the sum of the
+    three lower levels, as on page 3. Rows outside the mapped states are
+    dropped.
+    """
+    edu = store_df[store_df["Question"] == EDUCATION_QUESTION]
+    edu = edu[["Year", "State", "Education Level", "Percentage"]]
+    edu = edu.astype({"Year": int, "State": str, "Education Level": str})
+
+    college = edu[edu["Education Level"] == "College+"][["Year", "State", "Percentage"]]
+    college = college.assign(**{"Education Group": "College+"})
+
+    less = edu[edu["Education Level"].isin(LESS_THAN_COLLEGE_LEVELS)]
+    less = less.groupby(["Year", "State"], as_index=False)["Percentage"].sum()
+    less = less.assign(**{"Education Group": "Less than College"})
+
+    shares = pd.concat([college, less], ignore_index=True)
+    shares = shares[shares["State"].isin(US_STATE_ABBREV.keys())].dropna(subset=["Percentage"])
+    return shares.rename(columns={"Percentage": "Education_Percentage"})
+
+
+def indicator_pairs(store_df, question_to_filename):
+    """Every (indicator row, education share) pair page 3 would plot, for all views."""
+    filename_to_question = {v: k.strip() for k, v in question_to_filename.items()}
+    health = store_df[store_df["Question"].isin(filename_to_question.keys())]
+    health = health[["Question", "Year", "State", "Education Level", "n", "Percentage", "CI_low", "CI_high"]]
+    health = health.astype({"Question": str, "Year": int, "State": str, "Education Level": str})
+    health = health[health["State"].isin(US_STATE_ABBREV.keys())].dropna(subset=["Percentage"])
+    health["Indicator"] = health["Question"].map(filename_to_question)
+    pairs = health.merge(education_shares(store_df), on=["Year", "State"])
+    return pairs.rename(columns={"Percentage": "Health_Percentage"})
+
+
+def grouped_regression(pairs, by, x="Health_Percentage", y="Education_Percentage"):
+    """Pearson r and least-squares line of ``y`` on ``x`` for every group in ``by``.
+
+    All groups are reduced in one pass with ``np.bincount`` over the group
+    codes; the result has one row per group with ``n``, ``r``, ``slope``,
+    ``intercept`` and a two-sided ``p_value`` for r.
+    """
+    groups = pairs.groupby(by, sort=True, observed=True)
+    codes = groups.ngroup().to_numpy()
+    keys = groups.size().index.to_frame(index=False)
+    size = len(keys)
+
+    xv = pairs[x].to_numpy(dtype="float64")
+    yv = pairs[y].to_numpy(dtype="float64")
+    n = np.bincount(codes, minlength=size).astype("float64")
+    mean_x = np.bincount(codes, xv, size) / n
+    mean_y = np.bincount(codes, yv, size) / n
+    dx = xv - mean_x[codes]
+    dy = yv - mean_y[codes]
+    sxx = np.bincount(codes, dx * dx, size)
+    syy = np.bincount(codes, dy * dy, size)
+    sxy = np.bincount(codes, dx * dy, size)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = sxy / np.sqrt(sxx * syy)
+        slope = sxy / sxx
+        dof = n - 2
+        t = r * np.sqrt(dof / (1 - r ** 2))
+    p_value = np.where(dof > 0, 2 * special.stdtr(np.maximum(dof, 1), -np.abs(t)), np.nan)
+
+    return keys.assign(
+        n=n.astype(int),
+        r=r,
+        slope=slope,
+        intercept=mean_y - slope * mean_x,
+        p_value=p_value,
+    )
+
+
+def indicator_correlations(store_df, question_to_filename):
+    """r, slope, intercept and p-value for every indicator x year x education group."""
+    pairs = indicator_pairs(store_df, question_to_filename)
+    return grouped_regression(pairs, ["Year", "Education Group", "Indicator"])
+
+
+def _rowwise_regression(xs, ys):
+    # Pearson r and slope for every row of two (resamples, n) matrices.
+    dx = xs - xs.mean(axis=1, keepdims=True)
+    dy = ys - ys.mean(axis=1, keepdims=True)
+    sxx = np.einsum("ij,ij->i", dx, dx)
+    syy = np.einsum("ij,ij->i", dy, dy)
+    sxy = np.einsum("ij,ij->i", dx, dy)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return sxy / np.sqrt(sxx * syy), sxy / sxx
+
+
+def resampled_regression(x, y, n_resamples=10000, confidence=0.95, seed=0, chunk_size=2500):
+    """Bootstrap confidence intervals and a permutation test for r and the slope.
+
+    Resamples are drawn as index matrices and evaluated a chunk of rows at a
+    time, so each chunk is a single array operation. Bootstrap intervals are
+    percentile intervals; the permutation test shuffles ``y`` against ``x``
+    and reports two-sided p-values plus the central ``confidence`` band of
+    the null distribution.
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    n = len(x)
+    rng = np.random.default_rng(seed)
+    r_obs, slope_obs = _rowwise_regression(x[None, :], y[None, :])
+
+    boot_r, boot_slope, perm_r, perm_slope = [], [], [], []
+    for start in range(0, n_resamples, chunk_size):
+        rows = min(chunk_size, n_resamples - start)
+        idx = rng.integers(0, n, size=(rows, n))
+        r, slope = _rowwise_regression(x[idx], y[idx])
+        boot_r.append(r)
+        boot_slope.append(slope)
+
+        perm = rng.permuted(np.broadcast_to(np.arange(n), (rows, n)), axis=1)
+        r, slope = _rowwise_regression(np.broadcast_to(x, (rows, n)), y[perm])
+        perm_r.append(r)
+        perm_slope.append(slope)
+
+    tail = (1 - confidence) / 2 * 100
+    bounds = [tail, 100 - tail]
+    summary = {}
+    for name, observed, boot, perm in [
+        ("r", r_obs[0], np.concatenate(boot_r), np.concatenate(perm_r)),
+        ("slope", slope_obs[0], np.concatenate(boot_slope), np.concatenate(perm_slope)),
+    ]:
+        boot_low, boot_high = np.nanpercentile(boot, bounds)
+        null_low, null_high = np.nanpercentile(perm, bounds)
+        extreme = np.count_nonzero(np.abs(perm) >= abs(observed))
+        summary[name] = {
+            "estimate": observed,
+            "bootstrap_low": boot_low,
+            "bootstrap_high": boot_high,
+            "null_low": null_low,
+            "null_high": null_high,
+            "permutation_p": (extreme + 1) / (n_resamples + 1),
+        }
+    return pd.DataFrame(summary).T
@@ -0,0 +1,187 @@
+"""Persistent result cache that survives restarts and is shared by replicas.
+
+Results of :func:`persistent` functions are pickled into one SQLite file
+next to the store. Each entry is keyed by the function, its arguments, the
+content hashes of the CSV files the store was built from, and a hash of
+the ``lumina`` sources plus the file defining the function, so editing
+either the data or the code misses instead of serving stale results. The
+least recently used entries are evicted once the file holds more than
+:data:`MAX_BYTES`.
+
+Stack it under ``st.cache_data``, so repeat calls within a process are
+answered from memory and only the first call after a restart reads the
+disk::
+
+    @st.cache_data
+    @persistent
+    def load_indicator_correlations(): ...
+"""
+import functools
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+
+from lumina import metrics
+from lumina.catalog import DATA_DIR
+
+CACHE_PATH = DATA_DIR / "cache.sqlite"
+MAX_BYTES = int(os.environ.get("LUMINA_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+# Bump to drop every cached result, e.g. after a dependency upgrade that
+# changes results without touching this repo's code.
+CACHE_VERSION = "1"
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+
+
+class DiskCache:
+    """Size-bounded LRU key/value store in a SQLite file.
+
+    Storage errors are counted and treated as misses, so a read-only or
+    full disk slows the app down instead of breaking it.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._initialized = False
+        self.counters = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "errors": 0}
+
+    def _connect(self):
+        # One short-lived connection per call: safe across threads, and WAL
+        # lets other processes read while one writes.
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._initialized = True
+        return conn
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def get(self, key):
+        """``(True, value)`` for a stored key, otherwise ``(False, None)``."""
+        try:
+            with closing(self._connect()) as conn:
+                row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+            if row is not None:
+                value = pickle.loads(row[0])
+                self._count("hits")
+                return True, value
+        except Exception:
+            # Unreadable file or an entry pickled by incompatible code
+            self._count("errors")
+        self._count("misses")
+        return False, None
+
+    def set(self, key, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+        try:
+            with closing(self._connect()) as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                    (key, blob, len(blob), time.time()),
+                )
+                self._count("writes")
+                self._evict(conn)
+        except sqlite3.Error:
+            self._count("errors")
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+        self._count("evictions", len(evicted))
+
+    def stats(self):
+        """Entry count and bytes on disk, plus this process's counters."""
+        try:
+            with closing(self._connect()) as conn:
+                entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        except sqlite3.Error:
+            entries, size = 0, 0
+        with self._lock:
+            return {"entries": entries, "bytes": size, "max_bytes": self.max_bytes, **self.counters}
+
+    def clear(self):
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM entries")
+
+
+@functools.lru_cache(maxsize=None)
+def get_disk_cache():
+    return DiskCache()
+
+
+@functools.lru_cache(maxsize=None)
+def code_version():
+    digest = hashlib.sha256(CACHE_VERSION.encode("utf-8"))
+    for path in sorted(PACKAGE_DIR.glob("*.py")):
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def persistent(fn=None, fingerprint=None):
+    """Cache ``fn``'s results in :func:`get_disk_cache`, keyed as described above.
+
+    Arguments are pickled into the key, so they must be picklable; the
+    result must be too. ``fingerprint`` returns the data part of the key and
+    defaults to the shared dataset's, which imports Streamlit; functions
+    that read the store themselves pass
+    :func:`lumina.store.store_fingerprint` and work without it::
+
+        @persistent(fingerprint=store_fingerprint)
+        def indicator_statistics(): ...
+    """
+    if fn is None:
+        return functools.partial(persistent, fingerprint=fingerprint)
+    name = f"{fn.__module__}.{fn.__qualname__}"
+    source = hashlib.sha256(Path(fn.__code__.co_filename).read_bytes()).hexdigest()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if fingerprint is None:
+            # Imported here: the dataset module imports Streamlit
+            from lumina.dataset import get_dataset_fingerprint
+
+            data = get_dataset_fingerprint()
+        else:
+            data = fingerprint()
+        digest = hashlib.sha256()
+        for part in (name, code_version(), source, data):
+            digest.update(f"{part}\0".encode("utf-8"))
+        digest.update(pickle.dumps((args, sorted(kwargs.items())), protocol=4))
+        key = digest.hexdigest()
+
+        cache = get_disk_cache()
+        hit, value = cache.get(key)
+        metrics.count("disk", "hit" if hit else "miss")
+        if not hit:
+            with metrics.stage(f"compute {fn.__name__}"):
+                value = fn(*args, **kwargs)
+            cache.set(key, value)
+        return value
+
+    return wrapper
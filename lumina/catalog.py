@@ -0,0 +1,212 @@
+"""The survey indicator catalog and the manifest of the ``pages/data`` tree.
+
+:data:`CATEGORIES` is the one list of indicators, their display labels and
+source files that every page draws from.
+
+The manifest (``pages/data/manifest.json``) records the path, size, mtime,
+content hash, row count and parse status of every source CSV. A scan only
+stats the files; a file is re-hashed when its size or mtime changed, and
+the store (see :mod:`lumina.store`) re-parses it only when its hash did.
+
+``LUMINA_DATA_DIR`` points the app at another CSV tree, such as the
+synthetic ones written by ``benchmarks/synthetic.py``; the store and the
+manifest are then kept inside that tree.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+DATA_DIR = Path(os.environ.get("LUMINA_DATA_DIR") or Path(__file__).resolve().parents[1] / "pages" / "data")
+MANIFEST_PATH = DATA_DIR / "manifest.json"
+
+# Bump when the entry layout changes so existing manifests are discarded.
+MANIFEST_VERSION = "1"
+
+# Mode of atomically written files that do not exist yet, see replace_file
+FILE_MODE = 0o644
+
+YEARS = [2019, 2020, 2021, 2022, 2023]
+
+# Category -> [(display name, file base name under pages/data)]
+CATEGORIES = {
+    "Community Behaviors": [
+        ("    🤝 Formal Volunteer", "volunteer/formalvolunteer"),
+        ("    💸 Charity Donations", "volunteer/charitabledonations"),
+    ],
+    "Health Behaviors": [
+        ("    🍻 Alcohol drink", "alcohol drink/within last 30 days"),
+        ("    🍺 Binge drinkers", "alcohol drink/Binge drinkers (males having five or more drinks on one occasion, females having four or more drinks on one occasion)"),
+        ("    🍷 Heavy drinkers", "alcohol drink/Heavy drinkers (adult men having more than 14 drinks per week and adult women having more than 7 drinks per week)"),
+        ("    🍎 Consumed fruit less than one time per day", "fruit consumption/Consumed fruit less than one time per day (variable calculated from one or more BRFSS questions)"),
+        ("    🏃 Completed physical activity within past month", "physical activity/physical activity within past month"),
+        ("    💉 Adults aged 65+ w/ flu shot", "flu shot/Adults aged 65+ who have had a flu shot within the past year (variable calculated from one or more BRFSS questions)"),
+        ("    💉 Adults aged 65+ who have ever had a pneumonia vaccination", "pneumonia vaccination/Adults aged 65+ who have ever had a pneumonia vaccination (variable calculated from one or more BRFSS questions)"),
+        ("    ⚕️ Has it been 1 year since last visited a doctor for a routine checkup", "last physical checkup/1year since you last visited a doctor for a routine checkup"),
+    ],
+    "Chronic Health Conditions": [
+        ("    🦴 Diagnosed with Arthritis", "chronic health indicators/arthritis"),
+        ("    😤 Diagnosed with Asthma", "chronic health indicators/asthma"),
+        ("    🧠 Diagnosed with Depression", "chronic health indicators/depression"),
+        ("    🩸 Diagnosed with Diabetes", "chronic health indicators/diabetes"),
+        ("    ❤️ Heart Attack (at least once)", "chronic health indicators/heart attack at least once"),
+        ("    🧠 Stroke (at least once)", "chronic health indicators/stroke at least once"),
+    ],
+    "Health Access / Coverage": [
+        ("    💳 Adults who had some form of health insurance", "health care insurance/Adults who had some form of health insurance (variable calculated from one or more BRFSS questions)"),
+        ("    🚫 Do not have a single personal health care provider", "personal health care provider/do not have a single personal health care provider"),
+    ],
+    "Demographic Characteristics": [
+        ("    💼 Employed", "employment status/employed"),
+        ("    🧑‍💼 Self-employed", "employment status/selfemployed"),
+        ("    🚫 Unable to work", "employment status/unable to work"),
+        ("    💍 Married Marital Status", "martial status/married"),
+        ("    👶 Kids (No kids)", "number of kids/no kids"),
+        ("    👶 Kids (1 kid)", "number of kids/one kid"),
+        ("    👶 Kids (2 kids)", "number of kids/two kid"),
+        ("    🎖️ Veteran Status", "veteran/no"),  # get reverse percentage
+    ],
+    "Socioeconomic Indicators": [
+        ("    🏠 Home Ownership", "home ownership/do you own your home"),
+        ("    💰 Less than 15k", "household income/less than 15k"),
+        ("    💰 15k to 24k", "household income/15k to 24k"),
+        ("    💰 25k to 34k", "household income/25k to 34k"),
+        ("    💰 35k to 49k", "household income/35k to 49k"),
+        ("    💰 50k plus", "household income/more than 50k"),
+    ],
+    "Health Status Indicators (Self-Reported Days)": [
+        ("    🧠 14 or more days when mental health status not good", "mental health days/14ormoreDays when mental health status not good (variable calculated from one or more BRFSS questions)"),
+        ("    💪 14 or more days when physical health status not good", "physical health days/14ormoreDays when physical health status not good (variable calculated from one or more BRFSS questions)"),
+    ],
+}
+
+# Display name -> file base name
+QUESTION_TO_FILENAME = {name: filename for entries in CATEGORIES.values() for name, filename in entries}
+
+# File base name -> -1 where a lower percentage is better, 0 where neither
+# direction is better; every other indicator is better higher.
+DIRECTIONS = {
+    "alcohol drink/Binge drinkers (males having five or more drinks on one occasion, females having four or more drinks on one occasion)": -1,
+    "alcohol drink/Heavy drinkers (adult men having more than 14 drinks per week and adult women having more than 7 drinks per week)": -1,
+    "alcohol drink/within last 30 days": 0,
+    "fruit consumption/Consumed fruit less than one time per day (variable calculated from one or more BRFSS questions)": -1,
+    "chronic health indicators/arthritis": -1,
+    "chronic health indicators/asthma": -1,
+    "chronic health indicators/depression": -1,
+    "chronic health indicators/diabetes": -1,
+    "chronic health indicators/heart attack at least once": -1,
+    "chronic health indicators/stroke at least once": -1,
+    "personal health care provider/do not have a single personal health care provider": -1,
+    "employment status/unable to work": -1,
+    "martial status/married": 0,
+    "number of kids/no kids": 0,
+    "number of kids/one kid": 0,
+    "number of kids/two kid": 0,
+    "veteran/no": 0,
+    "household income/less than 15k": -1,
+    "household income/15k to 24k": 0,
+    "household income/25k to 34k": 0,
+    "household income/35k to 49k": 0,
+    "mental health days/14ormoreDays when mental health status not good (variable calculated from one or more BRFSS questions)": -1,
+    "physical health days/14ormoreDays when physical health status not good (variable calculated from one or more BRFSS questions)": -1,
+}
+
+# Flat dropdown list with the categories as visual headers
+QUESTION_LIST = [
+    item for category, entries in CATEGORIES.items()
+    for item in [f"── {category} ──"] + [name for name, _ in entries]
+]
+
+
+def iter_source_files(data_dir=DATA_DIR):
+    """Yield ``(question, year, path)`` for every ``<name>_<year>.csv`` file."""
+    for path in sorted(data_dir.rglob("*.csv")):
+        stem, _, year = path.stem.rpartition("_")
+        if not stem or not year.isdigit():
+            continue
+        question = path.relative_to(data_dir).with_name(stem).as_posix()
+        yield question, int(year), path
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_manifest(manifest_path=MANIFEST_PATH):
+    """``{"<question>_<year>": entry}`` from the last scan, or ``{}`` if there is none."""
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest["files"]
+
+
+def replace_file(tmp_path, path):
+    """``os.replace`` a finished temp file onto ``path``.
+
+    ``tempfile.mkstemp`` creates files readable by their owner only; the
+    temp file first takes the mode of the file it replaces, or
+    :data:`FILE_MODE` for a new one, so replicas and collectors running as
+    other users can read the result.
+    """
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = FILE_MODE
+    os.chmod(tmp_path, mode)
+    os.replace(tmp_path, path)
+
+
+def write_manifest(entries, manifest_path=MANIFEST_PATH):
+    # Temp file and replace, as for the store, so readers never see half a file.
+    fd, tmp_path = tempfile.mkstemp(dir=manifest_path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "files": entries}, f, indent=1, ensure_ascii=False)
+        replace_file(tmp_path, manifest_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return manifest_path
+
+
+def scan(data_dir=DATA_DIR, previous=None):
+    """Manifest entries for the files now under ``data_dir``.
+
+    Entries of ``previous`` (a :func:`read_manifest` result) are reused as
+    they are for files whose size and mtime have not changed. Other files
+    are hashed; their ``rows``, ``status`` and ``parsed_bytes`` stay
+    ``None`` until the store parses them, unless the content is unchanged.
+    """
+    previous = previous or {}
+    entries = {}
+    for question, year, path in iter_source_files(data_dir):
+        key = f"{question}_{year}"
+        stat = path.stat()
+        old = previous.get(key)
+        if old and old["size"] == stat.st_size and old["mtime_ns"] == stat.st_mtime_ns:
+            entries[key] = old
+            continue
+        entry = {
+            "question": question,
+            "year": year,
+            "path": path.relative_to(data_dir).as_posix(),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": file_hash(path),
+            "rows": None,
+            "status": None,
+            "parsed_bytes": None,
+        }
+        if old and old["sha256"] == entry["sha256"]:
+            # Touched but not changed
+            entry.update(rows=old["rows"], status=old["status"], parsed_bytes=old["parsed_bytes"])
+        entries[key] = entry
+    return entries
@@ -0,0 +1,39 @@
+"""Palette-based trace colors for the Comparison page.
+
+Instead of one color picker per plotted combination, every distinct value
+of the chosen dimension gets the next color of a qualitative palette, in
+sorted order, and a handful of per-value overrides are layered on top.
+"""
+import re
+
+import numpy as np
+import plotly.express as px
+
+PALETTES = {
+    name: getattr(px.colors.qualitative, name)
+    for name in ["Plotly", "D3", "G10", "T10", "Set1", "Set2", "Dark24", "Light24", "Alphabet", "Bold", "Safe", "Vivid"]
+}
+
+# Hex (#rgb / #rrggbb) or rgb(r,g,b), the forms the palettes themselves use
+COLOR_PATTERN = r"^(#[0-9A-Fa-f]{3}|#[0-9A-Fa-f]{6}|rgb\(\s*\d{1,3}\s*,\s*\d{1,3}\s*,\s*\d{1,3}\s*\))$"
+
+
+def is_color(value):
+    return isinstance(value, str) and re.match(COLOR_PATTERN, value.strip()) is not None
+
+
+def assign_colors(values, palette_name):
+    """``{value: color}`` cycling the palette over the sorted distinct ``values``."""
+    keys = sorted(set(values))
+    palette = np.asarray(PALETTES[palette_name], dtype=object)
+    return dict(zip(keys, palette[np.arange(len(keys)) % len(palette)]))
+
+
+def apply_overrides(color_map, overrides):
+    """Copy of ``color_map`` with the valid ``{value: color}`` overrides applied."""
+    color_map = dict(color_map)
+    color_map.update({
+        value: color.strip() for value, color in overrides.items()
+        if value in color_map and is_color(color)
+    })
+    return color_map
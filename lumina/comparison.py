@@ -0,0 +1,162 @@
+"""Large-selection rendering for the Comparison page.
+
+Selecting every question, year, state and level gives tens of thousands
+of points, and one plotly express trace per color key. Large-data mode
+summarizes the rows on the server when asked, and draws the rest as one
+WebGL trace per distinct color, with the hover details carried in
+``customdata`` instead of per-trace ``hover_data``.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from lumina.catalog import QUESTION_TO_FILENAME
+from lumina.parsing import TYPED_COLUMNS
+
+# "Auto" rendering switches to large-data mode above either limit
+LARGE_DATA_POINTS = 5000
+LARGE_DATA_KEYS = 50
+
+# Label -> (grouping columns kept, column collapsed, label for the collapsed value)
+SUMMARIES = {
+    "Every state and level": None,
+    "Median across states": (["Question", "Year", "Education Level"], "State", "All states (median)"),
+    "Mean across education levels": (["Question", "Year", "State"], "Education Level", "All levels (mean)"),
+}
+
+HOVER_COLUMNS = ["Question", "State", "Education Level", "Year", "Percentage"]
+
+
+def color_key(df):
+    return df["Question"] + " | " + df["Year"].astype(str) + " - " + df["Education Level"].astype(str)
+
+
+def _filenames(selected_questions):
+    # Page 4 lists the stripped display names
+    filenames = {name.strip(): filename for name, filename in QUESTION_TO_FILENAME.items()}
+    return {filenames[question]: question for question in selected_questions}
+
+
+def selection_options(backend, selected_questions, selected_years):
+    """``(states, education levels)`` present in the selected questions x years."""
+    filenames = list(_filenames(selected_questions))
+    return (backend.distinct("State", filenames, selected_years),
+            backend.distinct("Education Level", filenames, selected_years))
+
+
+def query_selection(backend, selected_questions, selected_years, states=None, levels=None):
+    """Rows of every selected question x year with ``Year``, ``Question`` and ``ColorKey`` added.
+
+    The state and level filters run in the same query; ``backend`` is a
+    :mod:`lumina.query` backend. ``None`` for ``states`` or
+    ``levels`` keeps all of them; the result is ``None`` when no row matches.
+    """
+    questions = _filenames(selected_questions)
+    df = backend.rows(list(questions), selected_years, states, levels)
+    if df.empty:
+        return None
+    df["Question"] = df["Question"].map(questions)
+    # Question, then year, in the order they were selected
+    order = np.lexsort((
+        pd.Categorical(df["Year"], categories=selected_years).codes,
+        pd.Categorical(df["Question"], categories=selected_questions).codes,
+    ))
+    df = df.iloc[order][TYPED_COLUMNS + ["Year", "Question"]].reset_index(drop=True)
+    df["ColorKey"] = color_key(df)
+    return df
+
+
+def summarize(df, summary):
+    """Collapse states or education levels of ``df`` as described by :data:`SUMMARIES`."""
+    spec = SUMMARIES[summary]
+    if spec is None:
+        return df
+    by, collapsed, label = spec
+    agg = {"Percentage": "median" if collapsed == "State" else "mean", "n": "sum"}
+    df = df.groupby(by, observed=True, sort=False).agg(agg).reset_index()
+    df[collapsed] = label
+    df["ColorKey"] = color_key(df)
+    return df
+
+
+def is_large(df, color_column):
+    return len(df) > LARGE_DATA_POINTS or df[color_column].nunique() > LARGE_DATA_KEYS
+
+
+def _hover(x, y):
+    # Axis columns are read back from x/y; only the rest travel as customdata.
+    columns = [col for col in HOVER_COLUMNS if col not in (x, y)]
+    lines = []
+    for col in HOVER_COLUMNS:
+        if col == x:
+            value = "%{x}"
+        elif col == y:
+            value = "%{y}"
+        else:
+            value = f"%{{customdata[{columns.index(col)}]}}"
+        lines.append(value if col == "Question" else f"{col}: {value}")
+    return columns, "<br>".join(lines) + "<extra></extra>"
+
+
+def _with_gaps(values, breaks):
+    # NaN (numbers) or None (labels) at each break, which plotly leaves unjoined
+    if values.dtype.kind in "fiu":
+        return np.insert(values.astype("float64"), breaks, np.nan)
+    return np.insert(values.astype(object), breaks, None, axis=0)
+
+
+def consolidated_figure(df, chart_type, x, y, colors, names, title):
+    """One trace per distinct color rather than per color key.
+
+    ``colors`` holds each row's color and ``names`` its legend label. Scatter
+    and line charts use WebGL (``scattergl``); lines of different keys that
+    share a color are kept apart with gaps. Bars have no WebGL variant, so
+    keys sharing a color share a bar slot.
+    """
+    df = df.assign(_color=np.asarray(colors), _name=np.asarray(names), Percentage=df["Percentage"].round(1))
+    hover_columns, hover_template = _hover(x, y)
+    fig = go.Figure()
+    for color, group in df.groupby("_color", sort=False):
+        keys = group["_name"].unique()
+        name = keys[0] if len(keys) == 1 else f"{keys[0]} (+{len(keys) - 1} more)"
+        if chart_type == "Line":
+            # One polyline per key, separated by None so they are not joined
+            group = group.sort_values(["_name", x], kind="stable")
+            breaks = np.flatnonzero(group["_name"].to_numpy()[1:] != group["_name"].to_numpy()[:-1]) + 1
+            xs = _with_gaps(group[x].to_numpy(), breaks)
+            ys = _with_gaps(group[y].to_numpy(), breaks)
+            customdata = _with_gaps(group[hover_columns].to_numpy(dtype=object), breaks)
+        else:
+            xs, ys = group[x].to_numpy(), group[y].to_numpy()
+            customdata = group[hover_columns].to_numpy(dtype=object)
+        common = dict(x=xs, y=ys, name=name, customdata=customdata, hovertemplate=hover_template)
+        if chart_type == "Bar":
+            fig.add_trace(go.Bar(marker_color=color, offsetgroup=color, **common))
+        else:
+            mode = "lines+markers" if chart_type == "Line" else "markers"
+            fig.add_trace(go.Scattergl(mode=mode, marker_color=color, line_color=color, **common))
+    fig.update_layout(title=title, barmode="group")
+    return fig
+
+
+def figure_report(fig, build_seconds, measure_payload=True):
+    """Points, traces, JSON payload size and build time of a finished figure.
+
+    Measuring the payload serializes the figure once more than Streamlit
+    does; without ``measure_payload`` its size and time are ``None``.
+    """
+    payload = serialize_ms = None
+    if measure_payload:
+        start = time.perf_counter()
+        payload = len(pio.to_json(fig, validate=False).encode("utf-8"))
+        serialize_ms = (time.perf_counter() - start) * 1000
+    return {
+        "points": sum(int(pd.notna(np.asarray(trace.x, dtype=object)).sum()) for trace in fig.data if trace.x is not None),
+        "traces": len(fig.data),
+        "payload_bytes": payload,
+        "build_ms": build_seconds * 1000,
+        "serialize_ms": serialize_ms,
+    }
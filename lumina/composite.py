@@ -0,0 +1,117 @@
+"""Composite Public Value Metric: one weighted score per state x education level.
+
+Every indicator is normalized within each year, across all states and
+education levels, so indicators on different scales can be added. Items
+that run against public value are reverse-coded first. Normalized values
+and their availability mask are computed once per method; a set of
+weights then scores every row with two matrix-vector products (weighted
+sum and weight actually available), so reweighting costs microseconds.
+"""
+import warnings
+
+import numpy as np
+
+from lumina.catalog import DIRECTIONS, YEARS
+from lumina.geo import US_STATE_ABBREV
+
+ROW_COLUMNS = ["Year", "State", "Education Level"]
+
+NORMALIZATIONS = ["z-score", "min-max"]
+
+# Items whose stored percentage runs against public value: every indicator
+# where lower is better, plus "veteran/no", which stores the complement of
+# the veteran share.
+REVERSE_CODED = {filename for filename, direction in DIRECTIONS.items() if direction < 0} | {"veteran/no"}
+
+# A row needs at least this share of the total weight to be scored
+MIN_COVERAGE = 0.5
+
+
+def indicator_matrix(store_df, question_to_filename, years=YEARS):
+    """``(rows, values, filenames)``: one row per year x state x level, one column per indicator."""
+    filenames = list(question_to_filename.values())
+    rows = store_df[
+        store_df["Question"].isin(filenames)
+        & store_df["Year"].isin(years)
+        & store_df["State"].isin(US_STATE_ABBREV.keys())
+    ]
+    rows = rows.astype({"Question": str, "Year": int, "State": str, "Education Level": str})
+    wide = rows.pivot_table(index=ROW_COLUMNS, columns="Question", values="Percentage", observed=True)
+    wide = wide.reindex(columns=filenames)
+    return wide.index.to_frame(index=False), wide.to_numpy(dtype="float64"), filenames
+
+
+def normalize(values, groups, method, reverse):
+    """Normalize each column of ``values`` within each ``groups`` value.
+
+    ``reverse`` is a boolean per column; reversed columns are negated
+    (z-score) or flipped to ``1 - x`` (min-max) so higher always scores
+    better. NaNs stay NaN.
+    """
+    normalized = np.full_like(values, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"), warnings.catch_warnings():
+        # Indicators missing in a year give all-NaN columns; they stay NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        for group in np.unique(groups):
+            in_group = groups == group
+            block = values[in_group]
+            if method == "z-score":
+                scaled = (block - np.nanmean(block, axis=0)) / np.nanstd(block, axis=0)
+                scaled = np.where(reverse, -scaled, scaled)
+            elif method == "min-max":
+                low, high = np.nanmin(block, axis=0), np.nanmax(block, axis=0)
+                scaled = (block - low) / (high - low)
+                scaled = np.where(reverse, 1 - scaled, scaled)
+            else:
+                raise ValueError(f"Unknown normalization: {method!r}")
+            normalized[in_group] = scaled
+    return normalized
+
+
+def normalized_matrices(store_df, question_to_filename, method, years=YEARS):
+    """Everything :func:`composite_scores` needs, precomputed for one ``method``.
+
+    Returns ``{"rows", "filenames", "values", "available"}``: ``values`` is
+    the normalized matrix with missing cells set to 0 and ``available``
+    the matching 0/1 mask, both ``float64`` of shape ``(rows, indicators)``.
+    Columns that are constant within a year (no spread to normalize) count
+    as missing there.
+    """
+    rows, values, filenames = indicator_matrix(store_df, question_to_filename, years)
+    reverse = np.array([filename in REVERSE_CODED for filename in filenames])
+    normalized = normalize(values, rows["Year"].to_numpy(), method, reverse)
+    available = np.isfinite(normalized)
+    return {
+        "rows": rows,
+        "filenames": filenames,
+        "values": np.where(available, normalized, 0.0),
+        "available": available.astype("float64"),
+    }
+
+
+def default_weights(filenames):
+    """1 for every indicator, 0 for those with no better direction."""
+    return np.array([0.0 if DIRECTIONS.get(filename, 1) == 0 else 1.0 for filename in filenames])
+
+
+def composite_scores(matrices, weights, min_coverage=MIN_COVERAGE):
+    """Weighted mean of the available normalized values of every row.
+
+    Returns ``rows`` with ``Score`` and ``Coverage`` (share of the total
+    weight with data) added; rows below ``min_coverage`` get a NaN score.
+    """
+    weights = np.asarray(weights, dtype="float64")
+    total = weights.sum()
+    covered = matrices["available"] @ weights
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = (matrices["values"] @ weights) / covered
+        coverage = covered / total if total else np.zeros_like(covered)
+    scores[coverage < min_coverage] = np.nan
+    return matrices["rows"].assign(Score=scores, Coverage=coverage)
+
+
+def ranked_scores(scores, year, level):
+    """Scored states of one year and level, best first, with a 1-based ``Rank``."""
+    view = scores[(scores["Year"] == year) & (scores["Education Level"] == level)].dropna(subset=["Score"])
+    view = view.sort_values("Score", ascending=False, kind="stable").reset_index(drop=True)
+    return view.assign(Rank=np.arange(1, len(view) + 1))
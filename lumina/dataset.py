@@ -0,0 +1,123 @@
+"""Process-wide survey dataset shared read-only by every page and session.
+
+The frames are built once per server process with ``st.cache_resource`` and
+handed out by reference, so memory does not grow with the number of
+sessions. Callers must copy a frame before modifying it.
+
+:func:`warm_up` starts that load on a background thread, so it runs while
+a visitor is still reading the homepage. Pages asking for the dataset in
+the meantime wait on the same lock and reuse the result.
+"""
+import logging
+import threading
+
+import streamlit as st
+
+from lumina.catalog import QUESTION_TO_FILENAME, YEARS
+from lumina.loader import assemble_loaded_data, parse_progress
+from lumina.query import make_backend
+from lumina.store import load_store, split_by_source, store_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+class SharedDataset:
+    """Lazily loaded, lock-guarded dataset; one instance per server process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._store = None
+        self._fingerprint = None
+        self._source = None
+        self._loaded_data = None
+        self._query_backend = None
+        self._warm_up_thread = None
+
+    def store_frame(self, on_progress=None):
+        # Sessions arriving while a load is in flight block here and reuse it.
+        with self._lock:
+            if self._store is None:
+                self._store = load_store(on_progress=on_progress)
+                self._fingerprint = store_fingerprint()
+            return self._store
+
+    def query_backend(self):
+        df, _ = self.store_frame()
+        with self._lock:
+            if self._query_backend is None:
+                self._query_backend = make_backend(df, self._fingerprint)
+            return self._query_backend
+
+    def fingerprint(self):
+        self.store_frame()
+        return self._fingerprint
+
+    def source_frames(self, on_progress=None):
+        df, sources = self.store_frame(on_progress)
+        with self._lock:
+            if self._source is None:
+                self._source = (split_by_source(df), sources)
+            return self._source
+
+    def loaded_data(self, on_progress=None):
+        source_frames, sources = self.source_frames(parse_progress(on_progress))
+        with self._lock:
+            if self._loaded_data is None:
+                self._loaded_data = assemble_loaded_data(
+                    source_frames, sources, QUESTION_TO_FILENAME, YEARS, on_progress
+                )
+            return self._loaded_data
+
+    def warm_up(self):
+        """Start loading every layer on a daemon thread; later calls return the same thread."""
+        with self._lock:
+            if self._warm_up_thread is None:
+                self._warm_up_thread = threading.Thread(target=self._warm_up, name="lumina-warm-up", daemon=True)
+                self._warm_up_thread.start()
+            return self._warm_up_thread
+
+    def _warm_up(self):
+        try:
+            self.loaded_data()
+            self.query_backend()
+        except Exception:
+            # Left for the first page to retry, which reports the error itself
+            logger.exception("Dataset warm-up failed")
+
+
+@st.cache_resource
+def get_shared_dataset():
+    return SharedDataset()
+
+
+def get_store_frame(on_progress=None):
+    """``(df, sources)``: the whole typed store, one row per state x level x file."""
+    return get_shared_dataset().store_frame(on_progress)
+
+
+def get_dataset_fingerprint():
+    """Hash of the files behind the loaded store; changes whenever any of them does."""
+    return get_shared_dataset().fingerprint()
+
+
+def get_query_backend():
+    """The :mod:`lumina.query` backend chosen by ``LUMINA_QUERY_BACKEND``, over the shared store."""
+    return get_shared_dataset().query_backend()
+
+
+def get_source_frames(on_progress=None):
+    """``(frames, sources)`` for every CSV under pages/data, see :mod:`lumina.store`."""
+    return get_shared_dataset().source_frames(on_progress)
+
+
+def get_loaded_data(on_progress=None):
+    """``{display_name: {year: frame | None | error}}`` for :data:`QUESTION_TO_FILENAME`.
+
+    ``on_progress`` only fires for the call that actually performs the load.
+    """
+    return get_shared_dataset().loaded_data(on_progress)
+
+
+def warm_up():
+    """Load the shared dataset in the background, once per process; returns the thread."""
+    return get_shared_dataset().warm_up()
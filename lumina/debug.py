@@ -0,0 +1,159 @@
+"""Streamlit side of :mod:`lumina.metrics`: per-page recording and the debug sidebar.
+
+A page runs its body under :func:`recording` after ``st.set_page_config``;
+a body that completes ends with the collapsible "Debug metrics" panel in
+the sidebar. Fragments are wrapped in :func:`panel` so their own reruns are
+recorded too; inside a full rerun a panel is one stage. Charts and tables
+go through :func:`plotly_chart` and :func:`dataframe`, which time the
+hand-off to Streamlit and record the payload size.
+
+Everything here is a pass-through while ``LUMINA_METRICS`` is off.
+"""
+import functools
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from lumina import metrics
+
+PAGE_KEY = "_metrics_page"
+PROFILE_KEY = "_metrics_profile_next"
+HISTORY_KEY = "_metrics_history"
+PROFILE_TEXT_KEY = "_metrics_profile_text"
+HISTORY_LENGTH = 20
+
+
+def begin(page):
+    """Start recording this script rerun of ``page``."""
+    if not metrics.ENABLED:
+        return
+    st.session_state[PAGE_KEY] = page
+    metrics.start(page, profile=st.session_state.pop(PROFILE_KEY, False))
+
+
+def end(draw=True):
+    """Finish the rerun started by :func:`begin` and, with ``draw``, draw the debug panel."""
+    rerun = metrics.finish()
+    if rerun is None:
+        return
+    _remember(rerun)
+    if draw:
+        _debug_sidebar(rerun)
+
+
+@contextmanager
+def recording(page):
+    """:func:`begin` and :func:`end` around the page body.
+
+    The rerun is finished in a ``finally``, so reruns cut short by
+    ``st.stop()``, ``st.rerun()`` or an exception are recorded too; only a
+    body that completes draws the panel.
+    """
+    begin(page)
+    completed = False
+    try:
+        yield
+        completed = True
+    finally:
+        end(draw=completed)
+
+
+def _remember(rerun):
+    history = st.session_state.setdefault(HISTORY_KEY, [])
+    history.append(rerun.to_record())
+    del history[:-HISTORY_LENGTH]
+    if rerun.profile_text is not None:
+        st.session_state[PROFILE_TEXT_KEY] = rerun.profile_text
+
+
+def _fragment_rerun():
+    # True while Streamlit reruns fragments only, without the page script
+    ctx = get_script_run_ctx()
+    return bool(ctx is not None and getattr(ctx, "fragment_ids_this_run", None))
+
+
+def panel(name):
+    """Decorator for a fragment body: a stage of the page, or a rerun of its own."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not metrics.ENABLED:
+                return fn(*args, **kwargs)
+            if not _fragment_rerun():
+                with metrics.stage(name):
+                    return fn(*args, **kwargs)
+            metrics.start(st.session_state.get(PAGE_KEY, "unknown"), kind=f"fragment:{name}")
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                rerun = metrics.finish()
+                if rerun is not None:
+                    _remember(rerun)
+        return wrapper
+    return decorate
+
+
+def plotly_chart(fig, name, **kwargs):
+    """``st.plotly_chart`` that records the figure's JSON size and the time to send it."""
+    if metrics.ENABLED:
+        metrics.add_payload("figure", name, metrics.figure_bytes(fig))
+    with metrics.stage(f"render {name}"):
+        return st.plotly_chart(fig, **kwargs)
+
+
+def dataframe(data, name, **kwargs):
+    """``st.dataframe`` that records the table's Arrow size and the time to send it."""
+    if metrics.ENABLED and isinstance(data, pd.DataFrame):
+        metrics.add_payload("table", name, metrics.frame_bytes(data))
+    with metrics.stage(f"render {name}"):
+        return st.dataframe(data, **kwargs)
+
+
+def _profile_next_rerun():
+    st.session_state[PROFILE_KEY] = True
+
+
+def _debug_sidebar(rerun):
+    with st.sidebar.expander("🛠️ Debug metrics"):
+        st.markdown(f"**This rerun: {rerun.seconds * 1000:.0f} ms**")
+        if rerun.stages:
+            stages = pd.DataFrame({"Stage": list(rerun.stages), "ms": [s * 1000 for s in rerun.stages.values()]})
+            st.dataframe(
+                stages.sort_values("ms", ascending=False), hide_index=True, width="stretch",
+                column_config={"ms": st.column_config.NumberColumn("ms", format="%.1f")},
+            )
+        if rerun.cache:
+            st.markdown("Result cache: " + ", ".join(f"{key} **{n}**" for key, n in sorted(rerun.cache.items())))
+        if rerun.payloads:
+            payloads = pd.DataFrame(rerun.payloads, columns=["Kind", "Name", "Bytes"])
+            st.dataframe(
+                payloads.assign(KB=payloads["Bytes"] / 1024)[["Kind", "Name", "KB"]],
+                hide_index=True, width="stretch",
+                column_config={"KB": st.column_config.NumberColumn("KB", format="%.1f")},
+            )
+            st.caption(f"Payload this rerun: {payloads['Bytes'].sum() / 1024:.1f} KB")
+
+        history = st.session_state.get(HISTORY_KEY, [])
+        if len(history) > 1:
+            st.markdown("**Recent reruns**")
+            st.dataframe(
+                pd.DataFrame([
+                    {"Kind": record["kind"], "ms": record["seconds"] * 1000,
+                     "KB": sum(p["bytes"] for p in record["payloads"]) / 1024}
+                    for record in reversed(history)
+                ]),
+                hide_index=True, width="stretch",
+                column_config={
+                    "ms": st.column_config.NumberColumn("ms", format="%.0f"),
+                    "KB": st.column_config.NumberColumn("KB", format="%.1f"),
+                },
+            )
+
+        st.button("🔬 Profile a rerun", on_click=_profile_next_rerun,
+                  help="Reruns this page under cProfile and shows the 30 slowest calls by cumulative time.")
+        profile_text = st.session_state.get(PROFILE_TEXT_KEY)
+        if profile_text:
+            st.code(profile_text, language=None)
+        st.caption(f"Written to `{metrics.JSONL_PATH}` and `{metrics.PROM_PATH}`.")
@@ -0,0 +1,149 @@
+"""Downloadable exports of the survey store for the Datasets page.
+
+Exports are cut from the typed store in one pass and written to
+:data:`EXPORT_DIR` under a hash of their content, format and
+:data:`EXPORT_VERSION`. A repeat download of the same selection, or of
+an unchanged full dataset, reads the existing file instead of
+re-serializing anything.
+
+The directory is a cache outside the data tree (``LUMINA_EXPORT_DIR``,
+default ``lumina-exports`` in the system temp directory), so the source
+scan never sees it. The least recently used files are deleted once it
+holds more than :data:`MAX_BYTES`.
+"""
+import hashlib
+import io
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+
+import pandas as pd
+
+from lumina.catalog import replace_file
+from lumina.store import split_by_source
+
+EXPORT_DIR = Path(os.environ.get("LUMINA_EXPORT_DIR") or Path(tempfile.gettempdir()) / "lumina-exports")
+MAX_BYTES = int(os.environ.get("LUMINA_EXPORT_MAX_BYTES", 512 * 1024 * 1024))
+
+# Bump when the exported layout changes so stale artifacts are not reused.
+EXPORT_VERSION = "1"
+
+# Label -> (file extension, MIME type)
+FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+# Page 2's combined download: the typed columns without n, plus the year
+COMBINED_COLUMNS = ["State", "Education Level", "Percentage", "CI_low", "CI_high", "Year"]
+
+
+def combined_frame(backend, question, years):
+    """All rows of ``question`` for ``years``, oldest year first, as one frame.
+
+    ``backend`` is a :mod:`lumina.query` backend.
+    """
+    rows = backend.rows([question], years, columns=COMBINED_COLUMNS)
+    return rows.sort_values("Year", kind="stable").reset_index(drop=True)
+
+
+def content_hash(df, *parts):
+    digest = hashlib.sha256()
+    for part in (EXPORT_VERSION, *parts, *df.columns):
+        digest.update(f"{part}\0".encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:20]
+
+
+def prune(export_dir=EXPORT_DIR, max_bytes=MAX_BYTES, keep=()):
+    """Delete the least recently used exports until ``export_dir`` holds at most ``max_bytes``.
+
+    Paths in ``keep`` are never deleted. Files another process removed
+    first are skipped.
+    """
+    files = []
+    for path in export_dir.glob("*"):
+        if path.suffix == ".tmp" or path in keep:
+            continue
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in files) + sum(path.stat().st_size for path in keep if path.exists())
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
+
+
+def _reuse(path):
+    # mtime doubles as the last-used time prune() orders by
+    try:
+        os.utime(path)
+        return True
+    except OSError:
+        return False
+
+
+def _write_atomic(path, write):
+    # Same temp-file-and-replace swap as the store, so a concurrent session
+    # never serves a half-written artifact.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        replace_file(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    prune(path.parent, keep={path})
+    return path
+
+
+def _write_frame(df, extension, path):
+    if extension == "csv":
+        df.to_csv(path, index=False)
+    elif extension == "csv.gz":
+        # Fixed mtime so identical content gives identical bytes
+        df.to_csv(path, index=False, compression={"method": "gzip", "mtime": 0})
+    elif extension == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        raise ValueError(f"Unknown export format: {extension!r}")
+
+
+def export_artifact(df, fmt):
+    """Path of ``df`` exported as ``fmt`` (a :data:`FORMATS` label), written once per content."""
+    extension, _ = FORMATS[fmt]
+    path = EXPORT_DIR / f"{content_hash(df, fmt)}.{extension}"
+    if not _reuse(path):
+        _write_atomic(path, lambda tmp: _write_frame(df, extension, tmp))
+    return path
+
+
+def dataset_zip(store_df):
+    """Path of a zip with one ``<question>_<year>.csv`` per source file in the store.
+
+    Each member is streamed into the archive straight from its store slice,
+    so only one file's CSV text exists at a time.
+    """
+    path = EXPORT_DIR / f"{content_hash(store_df, 'zip')}.zip"
+    if _reuse(path):
+        return path
+
+    def write(tmp):
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for (question, year), frame in split_by_source(store_df).items():
+                with archive.open(f"{question}_{year}.csv", "w") as member:
+                    with io.TextIOWrapper(member, encoding="utf-8", newline="") as text:
+                        frame.to_csv(text, index=False)
+
+    return _write_atomic(path, write)
@@ -0,0 +1,177 @@
+"""Figure builders for the Map + Regression, Trends and Public Value pages.
+
+The single-year maps and the regression scatter are the ones page 3 has
+always drawn; :mod:`lumina.report` renders the same figures offline. The
+animated variants put every year of an indicator into one figure as
+animation frames with a slider, so switching years happens in the browser
+without a rerun. The delta map shows a change over time on a diverging
+scale.
+"""
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from lumina.analysis import education_shares
+from lumina.geo import US_STATE_ABBREV
+from lumina.payload import compact_figure
+
+MAP_YEARS = [2019, 2020, 2021, 2022, 2023]
+
+
+def with_abbrev(df, value="Percentage"):
+    """Add the two-letter ``Abbrev`` column and drop rows that cannot be mapped."""
+    df = df.assign(Abbrev=df["State"].astype(str).map(US_STATE_ABBREV))
+    return df.dropna(subset=["Abbrev", value])
+
+
+def indicator_map(df_health, title, animation_frame=None, range_color=None):
+    fig = px.choropleth(
+        df_health,
+        locations='Abbrev',
+        locationmode='USA-states',
+        color='Percentage',
+        color_continuous_scale='Viridis',
+        scope='usa',
+        labels={'Percentage': '%'},
+        hover_name='State',
+        title=title,
+        animation_frame=animation_frame,
+        range_color=range_color,
+    )
+    fig.update_layout(
+        height=800,
+        margin={"r": 0, "t": 60, "l": 0, "b": 0}
+    )
+    return compact_figure(fig)
+
+
+def education_map(df_edu, edu_group, title, animation_frame=None, range_color=None):
+    fig = px.choropleth(
+        df_edu,
+        locations='Abbrev',
+        locationmode='USA-states',
+        color='Percentage',
+        color_continuous_scale='YlOrRd',
+        scope='usa',
+        labels={'Percentage': f'% {edu_group}'},
+        hover_name='State',
+        title=title,
+        animation_frame=animation_frame,
+        range_color=range_color,
+        height=800,
+        width=1000
+    )
+    return compact_figure(fig)
+
+
+def delta_map(df, column, label, title, lower_is_better=False):
+    """Diverging choropleth of a change, centred on zero.
+
+    Blue marks improvement: rising values, or falling ones when
+    ``lower_is_better``.
+    """
+    values = np.abs(df[column].to_numpy(dtype="float64", na_value=np.nan))
+    # initial: no warning for an all-NaN column and no error for an empty one
+    bound = float(np.nanmax(values, initial=0.0))
+    if not np.isfinite(bound) or bound == 0:
+        bound = 1.0
+    fig = px.choropleth(
+        df,
+        locations='Abbrev',
+        locationmode='USA-states',
+        color=column,
+        color_continuous_scale='RdBu_r' if lower_is_better else 'RdBu',
+        range_color=(-bound, bound),
+        scope='usa',
+        labels={column: label},
+        hover_name='State',
+        hover_data={'Abbrev': False, 'first': ':.1f', 'last': ':.1f'},
+        title=title,
+    )
+    fig.update_layout(
+        height=600,
+        margin={"r": 0, "t": 60, "l": 0, "b": 0}
+    )
+    return compact_figure(fig)
+
+
+def score_map(df, label, title):
+    fig = px.choropleth(
+        df,
+        locations='Abbrev',
+        locationmode='USA-states',
+        color='Score',
+        color_continuous_scale='Viridis',
+        scope='usa',
+        labels={'Score': label},
+        hover_name='State',
+        hover_data={'Abbrev': False, 'Rank': True, 'Score': ':.2f', 'Coverage': ':.0%'},
+        title=title,
+    )
+    fig.update_layout(
+        height=600,
+        margin={"r": 0, "t": 60, "l": 0, "b": 0}
+    )
+    return compact_figure(fig)
+
+
+def regression_figure(df_combined, indicator, edu_group, year):
+    """Indicator vs. education share per state, with the least-squares line.
+
+    ``df_combined`` has one row per plotted point with ``State``,
+    ``Health_Percentage`` and ``Education_Percentage``.
+    """
+    fig = px.scatter(
+        df_combined,
+        x="Health_Percentage",
+        y="Education_Percentage",
+        hover_name="State",
+        labels={
+            "Health_Percentage": indicator,
+            "Education_Percentage": f"% {edu_group}"
+        },
+        title=f"Correlation between '{indicator}' and Education in {year}"
+    )
+    fig.update_traces(marker=dict(size=12, color="blue"))
+    fig.update_layout(height=600)
+
+    x = df_combined["Health_Percentage"]
+    y = df_combined["Education_Percentage"]
+    if len(df_combined) >= 2:
+        slope, intercept = np.polyfit(x, y, 1)
+        line_x = np.linspace(x.min(), x.max(), 100)
+        fig.add_scatter(x=line_x, y=slope * line_x + intercept, mode="lines", name="Regression Line",
+                        line=dict(color="red"))
+    return compact_figure(fig)
+
+
+def _color_range(df):
+    # One scale for every frame so colors are comparable across years
+    return (float(df["Percentage"].min()), float(df["Percentage"].max()))
+
+
+def animated_indicator_map(store_df, filename, title, years=MAP_YEARS):
+    df = store_df[(store_df["Question"] == filename) & store_df["Year"].isin(years)]
+    df = with_abbrev(df.astype({"Year": int})).sort_values("Year", kind="stable")
+    return indicator_map(df, title, animation_frame="Year", range_color=_color_range(df))
+
+
+def animated_education_map(store_df, edu_group, years=MAP_YEARS):
+    shares = education_shares(store_df)
+    df = shares[(shares["Education Group"] == edu_group) & shares["Year"].isin(years)]
+    df = with_abbrev(df.rename(columns={"Education_Percentage": "Percentage"}))
+    df = df.sort_values("Year", kind="stable")
+    return education_map(df, edu_group, f"{edu_group} Attainment by Year",
+                         animation_frame="Year", range_color=_color_range(df))
+
+
+def start_at_frame(fig, name):
+    """Copy of an animated figure that opens on the frame called ``name``."""
+    names = [frame.name for frame in fig.frames]
+    if name not in names:
+        return fig
+    index = names.index(name)
+    fig = go.Figure(fig)
+    fig.update(data=fig.frames[index].data)
+    fig.layout.sliders[0].active = index
+    return fig
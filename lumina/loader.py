@@ -0,0 +1,64 @@
+"""Bulk loading of every question x year frame for the Raw Data Validation page."""
+import pandas as pd
+
+from lumina.store import get_source_frame, load_source_frames
+
+
+def classify(data):
+    if isinstance(data, pd.DataFrame):
+        return "ok"
+    if data is None:
+        return "missing"
+    return "error"
+
+
+def bulk_load(question_to_filename, years, on_progress=None, max_workers=None):
+    """Load ``{display_name: {year: frame | None | error}}`` for every question and year.
+
+    ``on_progress(stage, done, total, counts)`` is called after every file
+    with running ``ok`` / ``missing`` / ``error`` counts. When the compiled
+    store is stale the ``"Parsing"`` stage follows the CSVs being parsed on
+    the thread pool; the ``"Loading"`` stage then walks the requested
+    question x year grid.
+    """
+    source_frames, sources = load_source_frames(
+        on_progress=parse_progress(on_progress), max_workers=max_workers
+    )
+    return assemble_loaded_data(source_frames, sources, question_to_filename, years, on_progress)
+
+
+def parse_progress(on_progress):
+    """Adapt a bulk-load progress callback to the store's per-file callback."""
+    parse_counts = {"ok": 0, "missing": 0, "error": 0}
+
+    def report(done, total, key, status):
+        parse_counts["ok" if status == "ok" else "error"] += 1
+        if on_progress is not None:
+            on_progress("Parsing", done, total, dict(parse_counts))
+
+    return report
+
+
+def assemble_loaded_data(source_frames, sources, question_to_filename, years, on_progress=None):
+    counts = {"ok": 0, "missing": 0, "error": 0}
+    total = len(question_to_filename) * len(years)
+    done = 0
+    loaded_data = {}
+    for display_name, base_filename in question_to_filename.items():
+        question_data = {}
+        for year in years:
+            question_data[year] = get_source_frame(source_frames, sources, base_filename, year)
+            counts[classify(question_data[year])] += 1
+            done += 1
+            if on_progress is not None:
+                on_progress("Loading", done, total, dict(counts))
+        loaded_data[display_name.strip()] = question_data
+    return loaded_data
+
+
+def count_statuses(loaded_data):
+    counts = {"ok": 0, "missing": 0, "error": 0}
+    for yearly_data in loaded_data.values():
+        for data in yearly_data.values():
+            counts[classify(data)] += 1
+    return counts
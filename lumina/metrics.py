@@ -0,0 +1,279 @@
+"""Stage timings, cache counts and payload sizes for every rerun.
+
+Off unless ``LUMINA_METRICS`` is set to something other than ``0``; while
+off, :func:`stage` hands back a shared no-op context and nothing is
+recorded. While on, a page wraps each rerun in :func:`start` and
+:func:`finish` (see :mod:`lumina.debug`), code inside it wraps its steps
+in ``with stage("name"):``, and each finished rerun is
+
+* appended to ``reruns.jsonl`` as one JSON object, rolled over to
+  ``reruns.jsonl.1`` once the file passes :data:`MAX_JSONL_BYTES`, and
+* folded into process-wide totals that are rewritten to ``lumina.prom``
+  in the Prometheus text format, for a local scraper's textfile collector.
+
+Both files live in ``LUMINA_METRICS_DIR`` (default ``pages/data/metrics``).
+Stages timed outside a rerun, such as file parsing on the store's worker
+threads, are counted in the totals under the page ``background``.
+
+Nothing here imports Streamlit, so scripts and the benchmarks can use it.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+
+from lumina.catalog import DATA_DIR
+
+ENABLED = os.environ.get("LUMINA_METRICS", "") not in ("", "0")
+METRICS_DIR = Path(os.environ.get("LUMINA_METRICS_DIR") or DATA_DIR / "metrics")
+JSONL_PATH = METRICS_DIR / "reruns.jsonl"
+PROM_PATH = METRICS_DIR / "lumina.prom"
+MAX_JSONL_BYTES = 8 * 1024 * 1024
+
+BACKGROUND = "background"
+
+_NO_STAGE = nullcontext()
+_local = threading.local()
+_lock = threading.Lock()
+
+# Process-wide totals behind lumina.prom
+_reruns = {}          # (page, kind) -> [count, seconds]
+_stages = {}          # (page, stage) -> [count, seconds]
+_cache_events = {}    # (layer, result) -> count
+_payloads = {}        # (page, kind, name) -> bytes of the latest rerun
+
+
+class Rerun:
+    """What one script or fragment run recorded."""
+
+    def __init__(self, page, kind="script", profile=False):
+        self.page = page
+        self.kind = kind
+        self.started = time.time()
+        self.seconds = None
+        self.stages = {}      # name -> seconds, summed over repeats
+        self.cache = {}       # "layer.result" -> count
+        self.payloads = []    # (kind, name, bytes)
+        self.profile = None
+        self.profile_text = None
+        self._start = time.perf_counter()
+        if profile:
+            self.profile = cProfile.Profile()
+            try:
+                self.profile.enable()
+            except ValueError:
+                # Another profiler is already active on this thread
+                self.profile = None
+
+    def to_record(self):
+        return {
+            "time": datetime.fromtimestamp(self.started, timezone.utc).isoformat(timespec="milliseconds"),
+            "page": self.page,
+            "kind": self.kind,
+            "seconds": round(self.seconds, 6),
+            "stages": {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            "cache": self.cache,
+            "payloads": [{"kind": kind, "name": name, "bytes": size} for kind, name, size in self.payloads],
+            "profiled": self.profile_text is not None,
+        }
+
+
+class _Stage:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        add_stage(self.name, time.perf_counter() - self._start)
+        return False
+
+
+def current():
+    """The rerun being recorded on this thread, or ``None``."""
+    return getattr(_local, "rerun", None)
+
+
+def start(page, kind="script", profile=False):
+    """Begin recording a rerun of ``page`` on this thread.
+
+    ``profile`` runs :mod:`cProfile` over this thread until :func:`finish`.
+    Returns the :class:`Rerun`, or ``None`` while metrics are off.
+    """
+    if not ENABLED:
+        return None
+    _local.rerun = Rerun(page, kind, profile)
+    return _local.rerun
+
+
+def finish(write=True):
+    """End this thread's rerun, add it to the totals and, with ``write``, export both files."""
+    rerun = current()
+    if rerun is None:
+        return None
+    _local.rerun = None
+    rerun.seconds = time.perf_counter() - rerun._start
+    if rerun.profile is not None:
+        rerun.profile.disable()
+        out = io.StringIO()
+        pstats.Stats(rerun.profile, stream=out).sort_stats("cumulative").print_stats(30)
+        rerun.profile_text = out.getvalue()
+        rerun.profile = None
+
+    with _lock:
+        total = _reruns.setdefault((rerun.page, rerun.kind), [0, 0.0])
+        total[0] += 1
+        total[1] += rerun.seconds
+        for kind, name, size in rerun.payloads:
+            _payloads[(rerun.page, kind, name)] = size
+    if write:
+        export(rerun)
+    return rerun
+
+
+def stage(name):
+    """Context manager timing ``name`` into the current rerun and the totals."""
+    return _Stage(name) if ENABLED else _NO_STAGE
+
+
+def add_stage(name, seconds):
+    """Record ``seconds`` already measured by the caller as the stage ``name``."""
+    if not ENABLED:
+        return
+    rerun = current()
+    if rerun is not None:
+        rerun.stages[name] = rerun.stages.get(name, 0.0) + seconds
+    page = rerun.page if rerun is not None else BACKGROUND
+    with _lock:
+        total = _stages.setdefault((page, name), [0, 0.0])
+        total[0] += 1
+        total[1] += seconds
+
+
+def count(layer, result):
+    """Count a cache event, such as ``("disk", "hit")``."""
+    if not ENABLED:
+        return
+    rerun = current()
+    if rerun is not None:
+        key = f"{layer}.{result}"
+        rerun.cache[key] = rerun.cache.get(key, 0) + 1
+    with _lock:
+        _cache_events[(layer, result)] = _cache_events.get((layer, result), 0) + 1
+
+
+def add_payload(kind, name, size):
+    """Record ``size`` bytes sent to the browser for the figure or table ``name``."""
+    if not ENABLED:
+        return
+    rerun = current()
+    if rerun is not None:
+        rerun.payloads.append((kind, name, size))
+
+
+def figure_bytes(fig):
+    """Bytes of the JSON spec Streamlit sends for a Plotly figure."""
+    import plotly.io
+
+    return len(plotly.io.to_json(fig, validate=False).encode("utf-8"))
+
+
+def frame_bytes(df):
+    """Bytes of the Arrow IPC stream Streamlit sends for a DataFrame."""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().size
+
+
+# --- Export ---
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{_label(value)}"' for key, value in labels.items()) + "}"
+
+
+def prometheus_text():
+    """The process-wide totals in the Prometheus text exposition format."""
+    with _lock:
+        reruns = {key: tuple(total) for key, total in _reruns.items()}
+        stages = {key: tuple(total) for key, total in _stages.items()}
+        cache_events, payloads = dict(_cache_events), dict(_payloads)
+
+    lines = [
+        "# HELP lumina_reruns_total Completed script and fragment reruns.",
+        "# TYPE lumina_reruns_total counter",
+    ]
+    lines += [f"lumina_reruns_total{_labels(page=page, kind=kind)} {n}" for (page, kind), (n, _) in sorted(reruns.items())]
+    lines += [
+        "# HELP lumina_rerun_seconds_total Wall time spent in reruns.",
+        "# TYPE lumina_rerun_seconds_total counter",
+    ]
+    lines += [
+        f"lumina_rerun_seconds_total{_labels(page=page, kind=kind)} {s:.6f}" for (page, kind), (_, s) in sorted(reruns.items())
+    ]
+    lines += [
+        "# HELP lumina_stage_seconds_total Wall time spent in each named stage.",
+        "# TYPE lumina_stage_seconds_total counter",
+    ]
+    lines += [
+        f"lumina_stage_seconds_total{_labels(page=page, stage=name)} {s:.6f}" for (page, name), (_, s) in sorted(stages.items())
+    ]
+    lines += [
+        "# HELP lumina_stage_calls_total Times each named stage ran.",
+        "# TYPE lumina_stage_calls_total counter",
+    ]
+    lines += [f"lumina_stage_calls_total{_labels(page=page, stage=name)} {n}" for (page, name), (n, _) in sorted(stages.items())]
+    lines += [
+        "# HELP lumina_cache_events_total Cache lookups by layer and result.",
+        "# TYPE lumina_cache_events_total counter",
+    ]
+    lines += [
+        f"lumina_cache_events_total{_labels(layer=layer, result=result)} {n}"
+        for (layer, result), n in sorted(cache_events.items())
+    ]
+    lines += [
+        "# HELP lumina_payload_bytes Size of each figure and table sent to the browser on its latest rerun.",
+        "# TYPE lumina_payload_bytes gauge",
+    ]
+    lines += [
+        f"lumina_payload_bytes{_labels(page=page, kind=kind, name=name)} {size}"
+        for (page, kind, name), size in sorted(payloads.items())
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def export(rerun, jsonl_path=JSONL_PATH, prom_path=PROM_PATH):
+    """Append ``rerun`` to the JSON-lines file and rewrite the Prometheus file.
+
+    Write errors are ignored: metrics must never break a page.
+    """
+    line = json.dumps(rerun.to_record(), ensure_ascii=False) + "\n"
+    try:
+        with _lock:
+            jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+            if jsonl_path.exists() and jsonl_path.stat().st_size > MAX_JSONL_BYTES:
+                os.replace(jsonl_path, jsonl_path.with_name(jsonl_path.name + ".1"))
+            with open(jsonl_path, "a", encoding="utf-8") as f:
+                f.write(line)
+        text = prometheus_text()
+        # Unique temp name per thread, replaced in one step, so a scrape never sees half a file
+        tmp_path = prom_path.with_name(f".{prom_path.name}.{os.getpid()}.{threading.get_ident()}")
+        tmp_path.write_text(text, encoding="utf-8")
+        os.replace(tmp_path, prom_path)
+    except OSError:
+        pass
@@ -0,0 +1,39 @@
+"""Helpers for pages split into independently rerunning ``st.fragment`` panels.
+
+A widget inside a fragment only reruns that fragment by default. When other
+panels read the widget's value too, its ``on_change`` callback names every
+panel that depends on it, so the rerun covers exactly those panels and
+leaves the rest of the page as it was.
+
+:func:`paged_dataframe` is such a panel for long tables: it sends one page
+of rows at a time, and turning the page reruns only the table.
+"""
+import math
+
+import streamlit as st
+
+from lumina import debug
+from lumina.payload import compact_frame
+
+PAGE_SIZE = 100
+
+
+def rerun_panels(*keys):
+    """``on_change`` callback that reruns only the fragments keyed ``keys``."""
+    def callback():
+        st.rerun(list(keys))
+    return callback
+
+
+@st.fragment
+def paged_dataframe(df, name, key, page_size=PAGE_SIZE, **kwargs):
+    """``st.dataframe`` of ``df`` one page of ``page_size`` rows at a time."""
+    pages = max(1, math.ceil(len(df) / page_size))
+    page = 1
+    if pages > 1:
+        page_col, info_col = st.columns([1, 4])
+        page = page_col.number_input("Page", min_value=1, max_value=pages, value=1, step=1, key=key)
+        first = (page - 1) * page_size
+        info_col.caption(f"Rows {first + 1:,}–{min(first + page_size, len(df)):,} of {len(df):,}")
+    rows = df.iloc[(page - 1) * page_size:page * page_size]
+    debug.dataframe(compact_frame(rows), name, **kwargs)
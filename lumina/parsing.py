@@ -0,0 +1,57 @@
+import pandas as pd
+
+OUTPUT_COLUMNS = ["State", "Education Level", "n", "Percentage", "CI"]
+
+
+def parse_blocked_education_df(raw_df):
+    """Flatten a blocked ``Location,n,Percentage,95% CI`` survey export.
+
+    Each state appears as a header row (no ``n`` and no ``Percentage``)
+    followed by one row per education level. Header rows are found with a
+    mask, the state name is forward-filled onto the rows below it and only
+    rows with a percentage under a non-empty state are kept.
+    """
+    is_header = raw_df["n"].isna() & raw_df["Percentage"].isna()
+    state = raw_df["Location"].where(is_header).str.strip().ffill()
+    keep = ~is_header & raw_df["Percentage"].notna() & state.notna() & (state != "")
+
+    if not keep.any():
+        return pd.DataFrame()
+
+    return pd.DataFrame({
+        "State": state[keep],
+        "Education Level": raw_df["Location"][keep],
+        "n": raw_df["n"][keep],
+        "Percentage": raw_df["Percentage"][keep],
+        "CI": raw_df["95% CI"][keep],
+    }, columns=OUTPUT_COLUMNS).reset_index(drop=True)
+
+
+TYPED_COLUMNS = ["State", "Education Level", "n", "Percentage", "CI_low", "CI_high"]
+
+
+def parse_percentage(values):
+    # "10.0**" carries a footnote marker; "*" / "***" mark suppressed cells.
+    return pd.to_numeric(values.astype(str).str.rstrip("*"), errors="coerce").astype("float32")
+
+
+def to_typed_frame(parsed):
+    """Convert parser output to compact numeric columns.
+
+    ``n`` loses its thousands separators and becomes nullable Int32 (blank
+    or suppressed sizes are ``<NA>``), ``Percentage`` becomes float32
+    (suppressed cells are NaN) and the ``95% CI`` text is split into
+    float32 ``CI_low`` / ``CI_high`` bounds.
+    """
+    if parsed.empty:
+        parsed = pd.DataFrame(columns=OUTPUT_COLUMNS)
+    ci = parsed["CI"].astype(object).where(parsed["CI"].notna(), "").astype(str)
+    bounds = ci.str.split("-", n=1, expand=True).reindex(columns=[0, 1])
+    return pd.DataFrame({
+        "State": parsed["State"].astype(str),
+        "Education Level": parsed["Education Level"].astype(str).str.strip(),
+        "n": pd.to_numeric(parsed["n"].astype(str).str.replace(",", ""), errors="coerce").astype("Int32"),
+        "Percentage": parse_percentage(parsed["Percentage"]),
+        "CI_low": pd.to_numeric(bounds[0], errors="coerce").astype("float32"),
+        "CI_high": pd.to_numeric(bounds[1], errors="coerce").astype("float32"),
+    }, columns=TYPED_COLUMNS)
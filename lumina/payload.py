@@ -0,0 +1,130 @@
+"""Smaller figures and tables on the wire.
+
+Every rerun sends each figure as JSON and each table as Arrow, so what a
+chart carries beyond what it shows is paid for on every interaction:
+
+* :func:`compact_figure` rounds the plotted numbers to display precision
+  (``float32`` typed arrays for numeric data, short literals inside hover
+  data) and writes ``customdata`` columns that are constant within a
+  trace into its ``hovertemplate`` once instead of once per point. On
+  choropleths it keeps only the topmost of several shapes drawn for the
+  same state (page 3 maps draw one per education level, and only the last
+  is visible) and drops ``locations`` and ``hovertext`` from animation
+  frames when every frame repeats the base trace's, so the state lookup
+  is sent once per figure.
+* :func:`compact_frame` dictionary-encodes repetitive text columns, which
+  Arrow then sends once per distinct value.
+
+Nothing here changes what the user sees.
+"""
+import numpy as np
+import pandas as pd
+
+DECIMALS = 2
+
+_NUMERIC_PROPERTIES = ["x", "y", "z"]
+_SHARED_FRAME_PROPERTIES = ["locations", "hovertext"]
+_PER_LOCATION_PROPERTIES = ["locations", "z", "hovertext", "text", "customdata", "ids"]
+
+
+def _round_array(values, decimals):
+    array = np.asarray(values)
+    if array.dtype.kind == "f":
+        return np.round(array, decimals).astype("float32")
+    if array.dtype == object:
+        return np.array(
+            [round(v, decimals) if isinstance(v, float) else v for v in array.ravel()], dtype=object
+        ).reshape(array.shape)
+    return values
+
+
+def _literal(value):
+    if isinstance(value, (float, np.floating)):
+        return f"{value:g}"
+    return str(value)
+
+
+def _inline_constant_customdata(trace):
+    customdata = trace.customdata
+    template = trace.hovertemplate
+    if customdata is None or not template:
+        return
+    customdata = np.asarray(customdata, dtype=object)
+    if customdata.ndim != 2 or not len(customdata):
+        return
+
+    keep = []
+    for i in range(customdata.shape[1]):
+        # Gap rows (None) in line charts are never hovered
+        values = pd.unique(pd.Series(customdata[:, i]).dropna())
+        placeholder = f"%{{customdata[{i}]}}"
+        if len(values) == 1 and "%{" not in _literal(values[0]):
+            template = template.replace(placeholder, _literal(values[0]))
+        else:
+            keep.append(i)
+    if len(keep) == customdata.shape[1]:
+        return
+    for new, old in enumerate(keep):
+        template = template.replace(f"%{{customdata[{old}]}}", f"%{{customdata[{new}]}}")
+    trace.hovertemplate = template
+    trace.customdata = customdata[:, keep] if keep else None
+
+
+def _keep_topmost_locations(trace):
+    # Later shapes are drawn over earlier ones, so only the last per location shows
+    locations = np.asarray(trace.locations, dtype=object)
+    _, last_reversed = np.unique(locations[::-1], return_index=True)
+    if len(last_reversed) == len(locations):
+        return
+    keep = np.sort(len(locations) - 1 - last_reversed)
+    for name in _PER_LOCATION_PROPERTIES:
+        values = trace[name]
+        if values is not None and not isinstance(values, str) and len(values) == len(locations):
+            trace[name] = np.asarray(values, dtype=object if name != "z" else None)[keep]
+
+
+def _same(values, base):
+    return values is not None and np.array_equal(np.asarray(values, dtype=object), np.asarray(base, dtype=object))
+
+
+def compact_trace(trace, decimals=DECIMALS):
+    if trace.type == "choropleth" and trace.locations is not None:
+        _keep_topmost_locations(trace)
+    for name in _NUMERIC_PROPERTIES:
+        if name in trace and trace[name] is not None:
+            trace[name] = _round_array(trace[name], decimals)
+    if "customdata" in trace and trace.customdata is not None:
+        trace.customdata = _round_array(trace.customdata, decimals)
+        _inline_constant_customdata(trace)
+
+
+def compact_figure(fig, decimals=DECIMALS):
+    """Shrink ``fig``'s JSON in place, as described above, and return it."""
+    for trace in fig.data:
+        compact_trace(trace, decimals)
+    frames = fig.frames or ()
+    for frame in frames:
+        for trace in frame.data:
+            compact_trace(trace, decimals)
+    for i, base in enumerate(fig.data):
+        for name in _SHARED_FRAME_PROPERTIES:
+            # A frame updates the trace as the previous frame left it, not fig.data,
+            # so a property can only be left out when no frame changes it
+            traces = [frame.data[i] for frame in frames if i < len(frame.data)]
+            if (name not in base or base[name] is None or not traces or len(traces) < len(frames)
+                    or not all(_same(trace[name], base[name]) for trace in traces)):
+                continue
+            for trace in traces:
+                trace[name] = None
+    return fig
+
+
+def compact_frame(df, max_ratio=0.5):
+    """``df`` with text columns of few distinct values as categoricals, for a smaller Arrow table."""
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if (pd.api.types.is_string_dtype(series) or series.dtype == object) and len(series):
+            if series.nunique(dropna=True) <= max_ratio * len(series):
+                columns[col] = series.astype("category")
+    return df.assign(**columns) if columns else df
@@ -0,0 +1,160 @@
+"""Filtered reads of the store for the Comparison and Datasets pages.
+
+Both backends answer the same two queries, :meth:`rows` and
+:meth:`distinct`, with filters and projections pushed into them:
+
+- ``pandas`` (default): boolean masks over the memory-mapped store frame
+- ``sqlite``: a copy of the store in ``pages/data/query.sqlite``, indexed
+  on (question, year, state, education level), so a query reads only the
+  index ranges of the selected questions and years instead of scanning
+  every row. Worth it for much larger trees (county-level or
+  multi-decade data); set ``LUMINA_QUERY_BACKEND=sqlite`` to use it.
+
+The SQLite file is rebuilt whenever the store fingerprint changes.
+"""
+import os
+import sqlite3
+import tempfile
+from contextlib import closing
+
+import pandas as pd
+
+from lumina.catalog import DATA_DIR, replace_file
+from lumina.parsing import TYPED_COLUMNS
+
+QUERY_DB_PATH = DATA_DIR / "query.sqlite"
+QUERY_BACKEND = os.environ.get("LUMINA_QUERY_BACKEND", "pandas")
+
+# Store column -> SQL column
+SQL_COLUMNS = {
+    "Question": "question",
+    "Year": "year",
+    "State": "state",
+    "Education Level": "education_level",
+    "n": "n",
+    "Percentage": "percentage",
+    "CI_low": "ci_low",
+    "CI_high": "ci_high",
+}
+# Plain (non-categorical) dtypes both backends return
+DTYPES = {
+    "Question": str,
+    "Year": "int64",
+    "State": str,
+    "Education Level": str,
+    "n": "Int32",
+    "Percentage": "float32",
+    "CI_low": "float32",
+    "CI_high": "float32",
+}
+DEFAULT_COLUMNS = ["Question", "Year"] + TYPED_COLUMNS
+
+
+def _plain(rows):
+    return rows.astype({col: DTYPES[col] for col in rows.columns}).reset_index(drop=True)
+
+
+class PandasBackend:
+    """Masks over the store frame; no setup cost."""
+
+    def __init__(self, store_df):
+        self.store_df = store_df
+
+    def _mask(self, questions, years, states=None, levels=None):
+        df = self.store_df
+        mask = df["Question"].isin(questions) & df["Year"].isin(years)
+        if states is not None:
+            mask &= df["State"].isin(states)
+        if levels is not None:
+            mask &= df["Education Level"].isin(levels)
+        return mask
+
+    def rows(self, questions, years, states=None, levels=None, columns=None):
+        """Rows of ``questions`` x ``years`` in store order, optionally filtered.
+
+        ``None`` for ``states`` or ``levels`` means no filter on that column.
+        """
+        columns = columns or DEFAULT_COLUMNS
+        return _plain(self.store_df.loc[self._mask(questions, years, states, levels), columns])
+
+    def distinct(self, column, questions, years):
+        values = self.store_df.loc[self._mask(questions, years), column]
+        return sorted(values.astype(DTYPES[column]).unique().tolist())
+
+
+class SQLiteBackend:
+    """Indexed SQLite copy of the store, rebuilt when ``fingerprint`` changes."""
+
+    def __init__(self, store_df, fingerprint, path=QUERY_DB_PATH):
+        self.path = path
+        if self._fingerprint() != fingerprint:
+            self._build(store_df, fingerprint)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _fingerprint(self):
+        if not self.path.exists():
+            return None
+        try:
+            with closing(self._connect()) as conn:
+                return conn.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()[0]
+        except (sqlite3.Error, TypeError):
+            return None
+
+    def _build(self, store_df, fingerprint):
+        # Built next to the target and swapped in, like the store itself
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        os.close(fd)
+        try:
+            table = store_df[list(SQL_COLUMNS)].rename(columns=SQL_COLUMNS)
+            table = table.astype({"question": str, "state": str, "education_level": str, "year": "int64"})
+            with closing(sqlite3.connect(tmp_path)) as conn:
+                table.to_sql("survey", conn, index=False, chunksize=50_000)
+                conn.execute(
+                    "CREATE INDEX survey_filters ON survey (question, year, state, education_level)"
+                )
+                conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+                conn.execute("INSERT INTO meta VALUES ('fingerprint', ?)", (fingerprint,))
+                conn.commit()
+            replace_file(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def _where(questions, years, states=None, levels=None):
+        clauses, params = [], []
+        for column, values in (("question", questions), ("year", years), ("state", states),
+                               ("education_level", levels)):
+            if values is None:
+                continue
+            values = [int(v) for v in values] if column == "year" else [str(v) for v in values]
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        return " AND ".join(clauses), params
+
+    def rows(self, questions, years, states=None, levels=None, columns=None):
+        columns = columns or DEFAULT_COLUMNS
+        where, params = self._where(questions, years, states, levels)
+        # rowid order is store order, so each source keeps its file row order
+        sql = (f"SELECT {', '.join(SQL_COLUMNS[col] for col in columns)} FROM survey "
+               f"WHERE {where} ORDER BY rowid")
+        with closing(self._connect()) as conn:
+            rows = pd.read_sql_query(sql, conn, params=params)
+        rows.columns = columns
+        return _plain(rows)
+
+    def distinct(self, column, questions, years):
+        where, params = self._where(questions, years)
+        sql = f"SELECT DISTINCT {SQL_COLUMNS[column]} FROM survey WHERE {where}"
+        with closing(self._connect()) as conn:
+            return sorted(value for (value,) in conn.execute(sql, params))
+
+
+def make_backend(store_df, fingerprint, backend=QUERY_BACKEND):
+    if backend == "pandas":
+        return PandasBackend(store_df)
+    if backend == "sqlite":
+        return SQLiteBackend(store_df, fingerprint)
+    raise ValueError(f"Unknown query backend: {backend!r}")
@@ -0,0 +1,169 @@
+"""Weighted regressions of education share on each indicator.
+
+The plain fit on page 3 gives a state with n=126 the same pull as one with
+n=2,276. Here every indicator row is weighted either by its sample size or
+by the inverse variance implied by its 95% CI, optionally with household
+income covariates, and all indicator x year x education group models are
+solved together as a batch of small normal-equation systems.
+"""
+import numpy as np
+from scipy import special
+
+from lumina.analysis import indicator_pairs
+
+Z_95 = special.ndtri(0.975)
+
+WEIGHTINGS = {
+    "Inverse CI variance": "inverse_variance",
+    "Sample size (n)": "n",
+    "None (OLS)": None,
+}
+
+# Household income shares used as optional covariates, joined on state,
+# education level and year.
+INCOME_COVARIATES = {
+    "Income less than 15k": "household income/less than 15k",
+    "Income 15k to 24k": "household income/15k to 24k",
+    "Income 25k to 34k": "household income/25k to 34k",
+    "Income 35k to 49k": "household income/35k to 49k",
+    "Income 50k plus": "household income/more than 50k",
+}
+
+
+def observation_weights(pairs, weighting):
+    if weighting is None:
+        return np.ones(len(pairs))
+    if weighting == "n":
+        return pairs["n"].to_numpy(dtype="float64", na_value=np.nan)
+    if weighting == "inverse_variance":
+        se = (pairs["CI_high"] - pairs["CI_low"]).to_numpy(dtype="float64") / (2 * Z_95)
+        with np.errstate(divide="ignore"):
+            return 1 / se ** 2
+    raise ValueError(f"Unknown weighting: {weighting!r}")
+
+
+def regression_frame(store_df, question_to_filename, covariates=()):
+    """Indicator/education pairs with one extra column per covariate label."""
+    pairs = indicator_pairs(store_df, question_to_filename)
+    for label in covariates:
+        cov = store_df[store_df["Question"] == INCOME_COVARIATES[label]]
+        cov = cov[["Year", "State", "Education Level", "Percentage"]]
+        cov = cov.astype({"Year": int, "State": str, "Education Level": str})
+        cov = cov.drop_duplicates(["Year", "State", "Education Level"])
+        pairs = pairs.merge(cov.rename(columns={"Percentage": label}),
+                            on=["Year", "State", "Education Level"])
+    return pairs
+
+
+def batched_wls(pairs, by, y, x_cols, weights, robust=True):
+    """Fit ``y ~ 1 + x_cols`` by WLS separately for every group in ``by``.
+
+    The per-group ``X'WX`` and ``X'Wy`` sums are built with ``np.bincount``
+    and inverted as one stacked ``np.linalg.inv`` call. Standard errors are
+    HC1 when ``robust`` (normal p-values, as statsmodels does for robust
+    covariances) and classical otherwise (t p-values). Returns
+    ``(coefficients, fits)``: one row per group x term, and one row per
+    group with ``n``, ``r2``, ``adj_r2`` and the weighted mean of every
+    regressor (``mean <column>``).
+    """
+    keep = np.isfinite(weights) & (weights > 0)
+    keep &= pairs[[y] + x_cols].notna().all(axis=1).to_numpy()
+    pairs = pairs[keep]
+    w = weights[keep]
+
+    groups = pairs.groupby(by, sort=True, observed=True)
+    codes = groups.ngroup().to_numpy()
+    keys = groups.size().index.to_frame(index=False)
+    size = len(keys)
+    terms = ["Intercept"] + x_cols
+    k = len(terms)
+
+    X = np.column_stack([np.ones(len(pairs))] + [pairs[c].to_numpy(dtype="float64") for c in x_cols])
+    yv = pairs[y].to_numpy(dtype="float64")
+
+    def grouped(values):
+        return np.bincount(codes, values, size)
+
+    xtwx = np.empty((size, k, k))
+    xtwy = np.empty((size, k))
+    for a in range(k):
+        xtwy[:, a] = grouped(w * X[:, a] * yv)
+        for b in range(a, k):
+            xtwx[:, a, b] = xtwx[:, b, a] = grouped(w * X[:, a] * X[:, b])
+
+    n = np.bincount(codes, minlength=size).astype("float64")
+    dof = n - k
+    solvable = (dof > 0) & (np.linalg.matrix_rank(xtwx) == k)
+    xtwx[~solvable] = np.eye(k)
+    bread = np.linalg.inv(xtwx)
+    beta = np.einsum("gij,gj->gi", bread, xtwy)
+
+    resid = yv - np.einsum("ij,ij->i", X, beta[codes])
+    ssr = grouped(w * resid ** 2)
+    if robust:
+        meat = np.empty((size, k, k))
+        for a in range(k):
+            for b in range(a, k):
+                meat[:, a, b] = meat[:, b, a] = grouped(w ** 2 * resid ** 2 * X[:, a] * X[:, b])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = bread @ meat @ bread * (n / dof)[:, None, None]
+    else:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = bread * (ssr / dof)[:, None, None]
+
+    se = np.sqrt(np.einsum("gii->gi", cov))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        stat = beta / se
+    if robust:
+        p_value = 2 * special.ndtr(-np.abs(stat))
+    else:
+        p_value = 2 * special.stdtr(np.maximum(dof, 1)[:, None], -np.abs(stat))
+
+    w_sum = grouped(w)
+    mean_y = grouped(w * yv) / w_sum
+    tss = grouped(w * (yv - mean_y[codes]) ** 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r2 = 1 - ssr / tss
+        adj_r2 = 1 - (1 - r2) * (n - 1) / dof
+
+    for arr in (beta, se, stat, p_value):
+        arr[~solvable] = np.nan
+    r2[~solvable] = np.nan
+    adj_r2[~solvable] = np.nan
+
+    coefficients = keys.loc[keys.index.repeat(k)].reset_index(drop=True).assign(
+        term=np.tile(terms, size),
+        coef=beta.ravel(),
+        std_err=se.ravel(),
+        stat=stat.ravel(),
+        p_value=p_value.ravel(),
+    )
+    fits = keys.assign(n=n.astype(int), r2=r2, adj_r2=adj_r2, **{
+        f"mean {col}": grouped(w * X[:, i + 1]) / w_sum for i, col in enumerate(x_cols)
+    })
+    return coefficients, fits
+
+
+def indicator_wls(store_df, question_to_filename, weighting="inverse_variance", covariates=(), robust=True):
+    """Weighted fits of education share on every indicator x year x education group."""
+    covariates = list(covariates)
+    pairs = regression_frame(store_df, question_to_filename, covariates)
+    weights = observation_weights(pairs, weighting)
+    return batched_wls(
+        pairs, ["Year", "Education Group", "Indicator"], "Education_Percentage",
+        ["Health_Percentage"] + covariates, weights, robust=robust,
+    )
+
+
+def single_wls(pairs, weighting="inverse_variance", covariates=(), robust=True):
+    """statsmodels fit of one view's pairs, for the full model summary."""
+    # Imported here: statsmodels takes seconds to import and is only needed
+    # when a summary is requested.
+    import statsmodels.api as sm
+
+    covariates = list(covariates)
+    pairs = pairs.dropna(subset=["Education_Percentage", "Health_Percentage"] + covariates)
+    X = sm.add_constant(pairs[["Health_Percentage"] + covariates].astype("float64"))
+    model = sm.WLS(pairs["Education_Percentage"].astype("float64"), X,
+                   weights=observation_weights(pairs, weighting))
+    return model.fit(cov_type="HC1" if robust else "nonrobust")
@@ -0,0 +1,252 @@
+"""Offline report: every Map + Regression view rendered to static HTML.
+
+Renders, without Streamlit, the figures page 3 draws for every indicator x
+year x education group, using the same store, statistics and figure
+builders as the page::
+
+    python -m lumina.report                       # to pages/data/report
+    python -m lumina.report --output site/ --workers 4
+
+The output directory holds
+
+* ``regression/<indicator>_<year>_<group>.html``: the scatter with its
+  least-squares line, one per view;
+* ``indicator-maps/<indicator>_<year>.html`` and
+  ``education-maps/<group>_<year>.html``: the two maps, shared by the
+  views they belong to;
+* ``summary.json``: n, r, slope, intercept and p-value of every view, from
+  :func:`lumina.analysis.indicator_correlations`;
+* ``index.html`` linking all of it, and one ``plotly.min.js`` the figures
+  load (``--self-contained`` embeds it in every file instead).
+
+Indicators are spread over a process pool. Each worker memory-maps the
+compiled store itself, so only names and file lists cross processes.
+
+The statistics are read through
+:func:`lumina.results.indicator_statistics`, so a report over the default
+store also leaves them in the disk cache page 3 reads.
+"""
+import argparse
+import html
+import json
+import math
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+
+from lumina.analysis import EDUCATION_GROUPS, education_shares, indicator_correlations, indicator_pairs
+from lumina.catalog import DATA_DIR, QUESTION_TO_FILENAME, YEARS
+from lumina.figures import education_map, indicator_map, regression_figure, with_abbrev
+from lumina.results import indicator_statistics
+from lumina.store import STORE_PATH, load_store, read_store, store_fingerprint
+
+REPORT_DIR = DATA_DIR / "report"
+
+# Set in each worker by _init_worker
+_worker = {}
+
+
+def slug(text):
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")[:60]
+
+
+def regression_path(filename, year, edu_group):
+    return Path("regression") / f"{slug(filename)}_{year}_{slug(edu_group)}.html"
+
+
+def indicator_map_path(filename, year):
+    return Path("indicator-maps") / f"{slug(filename)}_{year}.html"
+
+
+def education_map_path(edu_group, year):
+    return Path("education-maps") / f"{slug(edu_group)}_{year}.html"
+
+
+def _write(fig, output_dir, relative_path, self_contained):
+    path = output_dir / relative_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Figures one directory down load the shared bundle from the report root
+    fig.write_html(path, include_plotlyjs=True if self_contained else "../plotly.min.js")
+    return relative_path.as_posix()
+
+
+def _init_worker(store_path, question_to_filename, output_dir, self_contained):
+    store_df, _ = read_store(store_path)
+    _worker.update(
+        store_df=store_df,
+        pairs=indicator_pairs(store_df, question_to_filename),
+        shares=education_shares(store_df),
+        output_dir=output_dir,
+        self_contained=self_contained,
+    )
+
+
+def render_indicator(question, filename, years=YEARS):
+    """Write the indicator maps and regression scatters of one indicator; returns the files written."""
+    store_df, pairs = _worker["store_df"], _worker["pairs"]
+    output_dir, self_contained = _worker["output_dir"], _worker["self_contained"]
+    indicator = question.strip()
+    written = []
+    for year in years:
+        df_health = store_df[(store_df["Question"] == filename) & (store_df["Year"] == year)]
+        df_health = with_abbrev(df_health.astype({"Year": int}))
+        if df_health.empty:
+            continue
+        written.append(_write(indicator_map(df_health, indicator), output_dir,
+                              indicator_map_path(filename, year), self_contained))
+        for edu_group in EDUCATION_GROUPS:
+            view = pairs[(pairs["Indicator"] == indicator) & (pairs["Year"] == year)
+                         & (pairs["Education Group"] == edu_group)]
+            if view.empty:
+                continue
+            written.append(_write(regression_figure(view, indicator, edu_group, year), output_dir,
+                                  regression_path(filename, year, edu_group), self_contained))
+    return written
+
+
+def render_education_maps(years=YEARS):
+    """Write the education map of every group and year; returns the files written."""
+    shares, output_dir, self_contained = _worker["shares"], _worker["output_dir"], _worker["self_contained"]
+    written = []
+    for edu_group in EDUCATION_GROUPS:
+        for year in years:
+            df_edu = shares[(shares["Education Group"] == edu_group) & (shares["Year"] == year)]
+            if df_edu.empty:
+                continue
+            df_edu = with_abbrev(df_edu.rename(columns={"Education_Percentage": "Percentage"}))
+            fig = education_map(df_edu, edu_group, f"{edu_group} Attainment in {year}")
+            written.append(_write(fig, output_dir, education_map_path(edu_group, year), self_contained))
+    return written
+
+
+def _number(value):
+    # JSON has no NaN
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+def summarize(stats, written, question_to_filename=QUESTION_TO_FILENAME, years=YEARS):
+    """One summary entry per view, with its ``stats`` row and the files rendered for it."""
+    stats = stats.set_index(["Indicator", "Year", "Education Group"])
+    views = []
+    for question, filename in question_to_filename.items():
+        indicator = question.strip()
+        for year in years:
+            for edu_group in EDUCATION_GROUPS:
+                key = (indicator, year, edu_group)
+                row = stats.loc[key] if key in stats.index else None
+                files = {
+                    "regression": regression_path(filename, year, edu_group).as_posix(),
+                    "indicator_map": indicator_map_path(filename, year).as_posix(),
+                    "education_map": education_map_path(edu_group, year).as_posix(),
+                }
+                views.append({
+                    "indicator": indicator,
+                    "question": filename,
+                    "year": year,
+                    "education_group": edu_group,
+                    "n": int(row["n"]) if row is not None else 0,
+                    **{name: _number(row[name]) if row is not None else None
+                       for name in ["r", "slope", "intercept", "p_value"]},
+                    "files": {kind: path for kind, path in files.items() if path in written},
+                })
+    return views
+
+
+def _format(value, spec):
+    return "–" if value is None else format(value, spec)
+
+
+def index_html(views, generated):
+    rows = []
+    for view in views:
+        links = " · ".join(
+            f'<a href="{html.escape(path)}">{kind.replace("_", " ")}</a>' for kind, path in view["files"].items()
+        )
+        rows.append(
+            f"<tr><td>{html.escape(view['indicator'])}</td><td>{view['year']}</td>"
+            f"<td>{html.escape(view['education_group'])}</td><td>{view['n']}</td>"
+            f"<td>{_format(view['r'], '.2f')}</td><td>{_format(view['slope'], '.3f')}</td>"
+            f"<td>{_format(view['intercept'], '.2f')}</td><td>{_format(view['p_value'], '.2e')}</td>"
+            f"<td>{links}</td></tr>"
+        )
+    return (
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Public Value Dashboard: all views</title>"
+        "<style>body{font-family:sans-serif}table{border-collapse:collapse}"
+        "td,th{padding:2px 8px;border-bottom:1px solid #ddd;text-align:left}</style></head><body>\n"
+        f"<h1>Indicator vs. education: all views</h1><p>Generated {html.escape(generated)}. "
+        "Statistics are in <a href=\"summary.json\">summary.json</a>.</p>\n"
+        "<table><tr><th>Indicator</th><th>Year</th><th>Education group</th><th>Points</th><th>r</th>"
+        "<th>Slope</th><th>Intercept</th><th>p-value</th><th>Figures</th></tr>\n"
+        + "\n".join(rows)
+        + "\n</table></body></html>\n"
+    )
+
+
+def build_report(output_dir=REPORT_DIR, max_workers=None, self_contained=False, store_path=STORE_PATH,
+                 question_to_filename=QUESTION_TO_FILENAME, on_progress=None):
+    """Render every view into ``output_dir``; returns the summary written to ``summary.json``.
+
+    ``on_progress(done, total)`` is called as each indicator finishes.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    store_df, _ = load_store(store_path=store_path)
+    if not self_contained:
+        import plotly.offline
+
+        (output_dir / "plotly.min.js").write_text(plotly.offline.get_plotlyjs(), encoding="utf-8")
+
+    written = set()
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(store_path, question_to_filename, output_dir, self_contained),
+    ) as pool:
+        futures = [pool.submit(render_education_maps)]
+        futures += [pool.submit(render_indicator, q, f) for q, f in question_to_filename.items()]
+        for done, future in enumerate(as_completed(futures), 1):
+            written.update(future.result())
+            if on_progress:
+                on_progress(done, len(futures))
+
+    if store_path == STORE_PATH and question_to_filename == QUESTION_TO_FILENAME:
+        # Same function and store as page 3, so its next load is a disk cache hit
+        stats = indicator_statistics()
+    else:
+        stats = indicator_correlations(store_df, question_to_filename)
+
+    generated = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    summary = {
+        "generated": generated,
+        "store": store_fingerprint(store_path),
+        "views": summarize(stats, written, question_to_filename),
+    }
+    (output_dir / "summary.json").write_text(json.dumps(summary, indent=1, ensure_ascii=False), encoding="utf-8")
+    (output_dir / "index.html").write_text(index_html(summary["views"], generated), encoding="utf-8")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", type=Path, default=REPORT_DIR, help=f"report directory (default: {REPORT_DIR})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: one per CPU)")
+    parser.add_argument("--self-contained", action="store_true",
+                        help="embed plotly.js in every figure instead of sharing one copy (about 4.5 MB per file)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    summary = build_report(
+        args.output, args.workers, args.self_contained,
+        on_progress=lambda done, total: print(f"\r{done}/{total} tasks", end="", flush=True),
+    )
+    files = sum(len(view["files"]) for view in summary["views"])
+    print(f"\nWrote {len(summary['views'])} views to {args.output} in {time.perf_counter() - start:.1f} s "
+          f"({files} figure links)")
+
+
+if __name__ == "__main__":
+    main()
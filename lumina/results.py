@@ -0,0 +1,19 @@
+"""Batch results shared by the pages and :mod:`lumina.report`.
+
+Defined here rather than on a page so both produce the same
+:func:`lumina.cache.persistent` key, and keyed on the store file instead
+of the shared dataset so neither this module nor the report imports
+Streamlit. A report run over the default store therefore leaves these
+results in the cache the page reads.
+"""
+from lumina.analysis import indicator_correlations
+from lumina.cache import persistent
+from lumina.catalog import QUESTION_TO_FILENAME
+from lumina.store import read_store, store_fingerprint
+
+
+@persistent(fingerprint=store_fingerprint)
+def indicator_statistics():
+    """n, r, slope, intercept and p-value of every indicator x year x education group."""
+    store_df, _ = read_store()
+    return indicator_correlations(store_df, QUESTION_TO_FILENAME)
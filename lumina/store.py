@@ -0,0 +1,254 @@
+"""Columnar store compiled from the ``pages/data`` CSV tree.
+
+Every ``<category>/<name>_<year>.csv`` file is parsed once, converted to
+typed columns (see :func:`lumina.parsing.to_typed_frame`) and appended to a
+single uncompressed Arrow (Feather v2) file, so the pages can memory-map one
+file instead of opening and parsing every CSV. The store records the
+content hash of each file it was built from; on a rebuild only files whose
+hash changed (see :mod:`lumina.catalog`) are parsed again. Rebuild it with::
+
+    python -m lumina.store
+"""
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from lumina.catalog import DATA_DIR, MANIFEST_PATH, read_manifest, replace_file, scan, write_manifest
+from lumina.metrics import stage
+from lumina.parsing import TYPED_COLUMNS, parse_blocked_education_df, to_typed_frame
+
+STORE_PATH = DATA_DIR / "dataset.arrow"
+
+STORE_COLUMNS = ["Question", "Year"] + TYPED_COLUMNS
+CATEGORICAL_COLUMNS = ["Question", "Year", "State", "Education Level"]
+
+# Bump when the stored schema changes so existing files get rebuilt.
+STORE_VERSION = "4"
+VERSION_KEY = b"lumina.version"
+SOURCES_KEY = b"lumina.sources"
+HASHES_KEY = b"lumina.hashes"
+PARSED_BYTES_KEY = b"lumina.parsed_bytes"
+
+
+def read_source_csv(path):
+    # Keep the value columns as raw text ("2,098", "*", "10.0**") so every
+    # file goes through the same conversion in to_typed_frame.
+    return pd.read_csv(path, dtype={"n": str, "Percentage": str, "95% CI": str})
+
+
+def _parse_source(path):
+    try:
+        with stage("csv read"):
+            raw = read_source_csv(path)
+        with stage("parse education blocks"):
+            parsed = parse_blocked_education_df(raw)
+        with stage("typed frame"):
+            typed = to_typed_frame(parsed)
+    except Exception as e:
+        return None, 0, f"Error parsing file: {str(e)}"
+    return typed, int(parsed.memory_usage(deep=True).sum()), "ok"
+
+
+def _reusable_sources(entries, store_path):
+    # {key: (frame | None, status)} for files the existing store holds at
+    # the same content hash
+    if not store_path.exists():
+        return {}
+    table = feather.read_table(store_path, memory_map=True)
+    metadata = table.schema.metadata or {}
+    if metadata.get(VERSION_KEY) != STORE_VERSION.encode("utf-8"):
+        return {}
+    hashes = json.loads(metadata[HASHES_KEY])
+    sources = json.loads(metadata[SOURCES_KEY])
+    unchanged = {key for key, entry in entries.items() if hashes.get(key) == entry["sha256"]}
+    if not unchanged:
+        return {}
+    frames = {f"{question}_{year}": frame for (question, year), frame in split_by_source(table.to_pandas()).items()}
+    return {key: (frames.get(key), sources[key]) for key in unchanged}
+
+
+def build_store(data_dir=DATA_DIR, store_path=STORE_PATH, max_workers=None, on_progress=None,
+                manifest_path=MANIFEST_PATH, entries=None):
+    """Write the whole CSV tree to ``store_path``, parsing only changed files.
+
+    ``entries`` is a :func:`lumina.catalog.scan` of ``data_dir``; it is
+    scanned here when not given. Files the existing store already holds at
+    the same content hash are copied over from it, the rest are read and
+    parsed concurrently on a thread pool. ``on_progress`` is called from the
+    calling thread as ``on_progress(done, total, key, status)`` after each
+    parsed file. Per-file outcomes (``"ok"`` or the parse error) are kept in
+    the schema metadata so callers can still tell a missing file from a
+    broken one. The manifest is updated with each file's row count and
+    status.
+    """
+    if entries is None:
+        entries = scan(data_dir, read_manifest(manifest_path))
+    results = {
+        key: (frame, entries[key]["parsed_bytes"] or 0, status)
+        for key, (frame, status) in _reusable_sources(entries, store_path).items()
+    }
+    to_parse = [key for key in entries if key not in results]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_parse_source, data_dir / entries[key]["path"]): key for key in to_parse}
+        for done, future in enumerate(as_completed(futures), 1):
+            key = futures[future]
+            results[key] = future.result()
+            if on_progress is not None:
+                on_progress(done, len(futures), key, results[key][-1])
+
+    # Assemble in file order so each source stays a contiguous block.
+    frames = []
+    sources = {}
+    parsed_bytes = 0
+    for key, entry in entries.items():
+        typed, nbytes, status = results[key]
+        sources[key] = status
+        parsed_bytes += nbytes
+        entry.update(rows=0 if typed is None else len(typed), status=status, parsed_bytes=nbytes)
+        if typed is None or typed.empty:
+            continue
+        frames.append(typed.assign(Question=entry["question"], Year=entry["year"]))
+
+    if frames:
+        df = pd.concat(frames, ignore_index=True)
+    else:
+        df = to_typed_frame(pd.DataFrame()).assign(Question="", Year=0)
+    df = df.astype({col: "category" for col in CATEGORICAL_COLUMNS})
+
+    table = pa.Table.from_pandas(df[STORE_COLUMNS], preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[VERSION_KEY] = STORE_VERSION.encode("utf-8")
+    metadata[SOURCES_KEY] = json.dumps(sources).encode("utf-8")
+    metadata[HASHES_KEY] = json.dumps({key: entry["sha256"] for key, entry in entries.items()}).encode("utf-8")
+    metadata[PARSED_BYTES_KEY] = str(parsed_bytes).encode("utf-8")
+    table = table.replace_schema_metadata(metadata)
+
+    # Write next to the target and swap in atomically so concurrent
+    # workers never memory-map a half-written file.
+    fd, tmp_path = tempfile.mkstemp(dir=store_path.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        replace_file(tmp_path, store_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    write_manifest(entries, manifest_path)
+    return store_path
+
+
+def read_store_metadata(store_path=STORE_PATH):
+    # Only the schema is read; no column data is touched.
+    with pa.memory_map(str(store_path)) as source:
+        return pa.ipc.open_file(source).schema.metadata or {}
+
+
+def store_fingerprint(store_path=STORE_PATH):
+    """Short hash of the store version and the content of every file it was built from."""
+    metadata = read_store_metadata(store_path)
+    digest = hashlib.sha256(metadata[VERSION_KEY] + b"\0" + metadata[HASHES_KEY])
+    return digest.hexdigest()[:20]
+
+
+def is_stale(entries, store_path=STORE_PATH):
+    """Whether the store is missing, outdated, or was built from other file contents than ``entries``."""
+    if not store_path.exists():
+        return True
+    metadata = read_store_metadata(store_path)
+    if metadata.get(VERSION_KEY) != STORE_VERSION.encode("utf-8"):
+        return True
+    return json.loads(metadata[HASHES_KEY]) != {key: entry["sha256"] for key, entry in entries.items()}
+
+
+def load_store(data_dir=DATA_DIR, store_path=STORE_PATH, on_progress=None, max_workers=None,
+               manifest_path=MANIFEST_PATH):
+    """Memory-map the compiled store, bringing it up to date with the CSVs first.
+
+    The CSV tree is checked against the manifest, which only stats files
+    that have not changed. ``on_progress`` and ``max_workers`` are passed to
+    :func:`build_store` when a rebuild happens.
+
+    Returns ``(df, sources)`` where ``sources`` maps ``"<question>_<year>"``
+    to ``"ok"`` or the parse error for that file.
+    """
+    with stage("manifest scan"):
+        previous = read_manifest(manifest_path)
+        entries = scan(data_dir, previous)
+    if is_stale(entries, store_path):
+        with stage("store build"):
+            build_store(data_dir, store_path, max_workers, on_progress, manifest_path, entries)
+    elif entries != previous:
+        write_manifest(entries, manifest_path)
+    with stage("store read"):
+        return read_store(store_path)
+
+
+def read_store(store_path=STORE_PATH):
+    """``(df, sources)`` from the store as it is on disk, without checking the CSVs."""
+    table = feather.read_table(store_path, memory_map=True)
+    return table.to_pandas(), json.loads(table.schema.metadata[SOURCES_KEY])
+
+
+def split_by_source(df):
+    """Return ``{(question, year): frame}`` with one typed frame per source file.
+
+    Rows of one source file are contiguous in the store, so each frame is a
+    positional slice of the store rather than a copy.
+    """
+    question_codes = df["Question"].cat.codes.to_numpy()
+    year_codes = df["Year"].cat.codes.to_numpy()
+    boundaries = np.flatnonzero(
+        (np.diff(question_codes) != 0) | (np.diff(year_codes) != 0)
+    ) + 1
+    starts = np.concatenate([[0], boundaries])
+    ends = np.concatenate([boundaries, [len(df)]])
+
+    frames = {}
+    for start, end in zip(starts, ends):
+        key = (df["Question"].iat[start], int(df["Year"].iat[start]))
+        frames[key] = df.iloc[start:end][TYPED_COLUMNS].reset_index(drop=True)
+    return frames
+
+
+def memory_report(df, store_path=STORE_PATH):
+    """Bytes held by the per-file parser output versus the typed store frame."""
+    parsed_bytes = int(read_store_metadata(store_path).get(PARSED_BYTES_KEY, b"0"))
+    typed_bytes = int(df.memory_usage(deep=True).sum())
+    return {
+        "parsed_bytes": parsed_bytes,
+        "typed_bytes": typed_bytes,
+        "ratio": parsed_bytes / typed_bytes if typed_bytes else float("nan"),
+    }
+
+
+def load_source_frames(data_dir=DATA_DIR, store_path=STORE_PATH, on_progress=None, max_workers=None):
+    df, sources = load_store(data_dir, store_path, on_progress=on_progress, max_workers=max_workers)
+    return split_by_source(df), sources
+
+
+def get_source_frame(frames, sources, question, year):
+    """Look up one file's parsed frame.
+
+    Mirrors reading the CSV directly: ``None`` if the file does not exist,
+    the error message if it failed to parse, otherwise a DataFrame. The
+    frame is the shared instance, so copy it before modifying it.
+    """
+    status = sources.get(f"{question}_{year}")
+    if status is None:
+        return None
+    if status != "ok":
+        return status
+    frame = frames.get((question, year))
+    return frame if frame is not None else to_typed_frame(pd.DataFrame())
+
+
+if __name__ == "__main__":
+    path = build_store()
+    print(f"Wrote {path} ({path.stat().st_size:,} bytes)")
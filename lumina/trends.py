@@ -0,0 +1,122 @@
+"""Change over time for every indicator x state x education level.
+
+The store rows of all indicators are stacked into one ``(series, year)``
+matrix, with NaN where a year is missing or suppressed. Least-squares
+trends of every series are then solved together from masked sums over
+that matrix, and year-over-year deltas are one ``np.diff``, so the full
+sweep of roughly 35 x 53 x 4 series is a few array operations rather
+than a loop over groups.
+"""
+import numpy as np
+import pandas as pd
+from scipy import special
+
+from lumina.catalog import DIRECTIONS, YEARS
+from lumina.geo import US_STATE_ABBREV
+
+SERIES_COLUMNS = ["Indicator", "Question", "State", "Education Level"]
+
+
+def trend_matrix(store_df, question_to_filename, years=YEARS):
+    """``(series, values)``: one row per indicator x state x level and a ``(rows, len(years))`` array."""
+    filename_to_question = {v: k.strip() for k, v in question_to_filename.items()}
+    rows = store_df[
+        store_df["Question"].isin(filename_to_question.keys())
+        & store_df["Year"].isin(years)
+        & store_df["State"].isin(US_STATE_ABBREV.keys())
+    ]
+
+    # Work on the store's category codes; strings are only built for the
+    # distinct series at the end.
+    key_columns = ["Question", "State", "Education Level"]
+    columns = [rows[col].cat for col in key_columns]
+    key = np.zeros(len(rows), dtype="int64")
+    for col in columns:
+        key = key * len(col.categories) + col.codes.to_numpy()
+    unique_keys, series_index = np.unique(key, return_inverse=True)
+    year_index = pd.Index(years).get_indexer(rows["Year"].cat.categories)[rows["Year"].cat.codes.to_numpy()]
+    values = np.full((len(unique_keys), len(years)), np.nan)
+    values[series_index, year_index] = rows["Percentage"].to_numpy()
+
+    series = {}
+    for name, col in reversed(list(zip(key_columns, columns))):
+        unique_keys, codes = np.divmod(unique_keys, len(col.categories))
+        series[name] = np.asarray(col.categories.astype(str))[codes]
+    series = pd.DataFrame(series)
+    series.insert(0, "Indicator", series["Question"].map(filename_to_question))
+    return series[SERIES_COLUMNS], values
+
+
+def fit_trends(values, years=YEARS):
+    """Least-squares line through each row of ``values`` against ``years``, skipping NaNs.
+
+    Returns ``slope`` (points per year), ``intercept`` at the first year,
+    ``r2``, the two-sided ``p_value`` of the slope and ``n_years`` per row.
+    Rows with fewer than two years get NaN.
+    """
+    t = np.asarray(years, dtype="float64") - years[0]
+    observed = ~np.isnan(values)
+    y = np.where(observed, values, 0.0)
+    n = observed.sum(axis=1).astype("float64")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_t = (observed * t).sum(axis=1) / n
+        mean_y = y.sum(axis=1) / n
+        dt = np.where(observed, t - mean_t[:, None], 0.0)
+        dy = np.where(observed, y - mean_y[:, None], 0.0)
+        stt = (dt * dt).sum(axis=1)
+        syy = (dy * dy).sum(axis=1)
+        sty = (dt * dy).sum(axis=1)
+        slope = sty / stt
+        r2 = sty * sty / (stt * syy)
+        dof = n - 2
+        residual = np.maximum(syy - slope * sty, 0.0)
+        t_stat = slope / np.sqrt(residual / dof / stt)
+    p_value = np.where(dof > 0, 2 * special.stdtr(np.maximum(dof, 1), -np.abs(t_stat)), np.nan)
+
+    return pd.DataFrame({
+        "slope": slope,
+        "intercept": mean_y - slope * mean_t,
+        "r2": r2,
+        "p_value": p_value,
+        "n_years": n.astype(int),
+    })
+
+
+def indicator_trends(store_df, question_to_filename, years=YEARS):
+    """Trend, total change and year-over-year deltas of every indicator x state x level.
+
+    ``change`` runs from the first to the last observed year. Each
+    ``"<year> Δ"`` column is the change from the year before (NaN if
+    either year is missing). ``improvement`` is ``slope`` signed by
+    :data:`lumina.catalog.DIRECTIONS`, so positive always means better;
+    it is NaN for indicators with no better direction.
+    """
+    series, values = trend_matrix(store_df, question_to_filename, years)
+    fits = fit_trends(values, years)
+
+    observed = ~np.isnan(values)
+    first = np.argmax(observed, axis=1)
+    last = len(years) - 1 - np.argmax(observed[:, ::-1], axis=1)
+    index = np.arange(len(values))
+    deltas = pd.DataFrame(np.diff(values, axis=1), columns=[f"{year} Δ" for year in years[1:]])
+
+    direction = series["Question"].map(DIRECTIONS).fillna(1).to_numpy()
+    return pd.concat([series, fits, deltas], axis=1).assign(
+        first=values[index, first],
+        last=values[index, last],
+        change=values[index, last] - values[index, first],
+        improvement=np.where(direction != 0, fits["slope"] * direction, np.nan),
+    )
+
+
+def fastest_movers(trends, indicator, level, count=10):
+    """``(improving, worsening)``: the states whose trend improves or worsens fastest.
+
+    Only series with at least three years are ranked. For indicators with no
+    better direction, "improving" means rising and "worsening" falling.
+    """
+    view = trends[(trends["Indicator"] == indicator) & (trends["Education Level"] == level)]
+    view = view[view["n_years"] >= 3]
+    score = view["improvement"].fillna(view["slope"])
+    return view.loc[score.nlargest(count).index], view.loc[score.nsmallest(count).index]
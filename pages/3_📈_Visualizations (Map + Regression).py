@@ -1,226 +1,307 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import os
 import numpy as np
 
+from lumina import debug
+from lumina.analysis import resampled_regression
+from lumina.cache import persistent
+from lumina.catalog import QUESTION_TO_FILENAME
+from lumina.dataset import get_source_frames, get_store_frame
+from lumina.figures import (
+    animated_education_map, animated_indicator_map, education_map, indicator_map, regression_figure, start_at_frame,
+    with_abbrev,
+)
+from lumina.metrics import stage
+from lumina.panels import rerun_panels
+from lumina.regression import INCOME_COVARIATES, WEIGHTINGS, indicator_wls, regression_frame, single_wls
+from lumina.results import indicator_statistics
+from lumina.store import get_source_frame
+
 st.set_page_config(layout="wide")
+with debug.recording("Map + Regression"):
+    @st.cache_data
+    @persistent
+    def load_data():
+        source_frames, sources = get_source_frames()
+        dfs = {}
+        for year in range(2019, 2024):  # Adjust range as needed
+            df = get_source_frame(source_frames, sources, "overall education/education level", year).copy()
+            df['Year'] = year
+            dfs[year] = df
+        return dfs
 
-def parse_blocked_education_df(raw_df):
-    records = []
-    current_state = None
-
-    for _, row in raw_df.iterrows():
-        if pd.isna(row["n"]) and pd.isna(row["Percentage"]):
-            current_state = row["Location"].strip()
-        elif current_state and not pd.isna(row["Percentage"]):
-            records.append({
-                "State": current_state,
-                "Education Level": row["Location"],
-                "n": row["n"],
-                "Percentage": row["Percentage"],
-                "CI": row["95% CI"]
-            })
-    return pd.DataFrame(records)
-
-# Simulated loading function — replace with your real loading logic
-@st.cache_data
-def load_data():
-    dfs = {}
-    for year in range(2019, 2024):  # Adjust range as needed
-        df = parse_blocked_education_df(pd.read_csv(f"pages/data/overall education/education level_{year}.csv"))
-        df['Year'] = year
-        dfs[year] = df
-    return dfs
-
-@st.cache_data
-def load_health_stat(filename, year):
-    full_path = os.path.join("pages/data/", filename + f"_{year}.csv")
-    df = parse_blocked_education_df(pd.read_csv(full_path))
-    df['State'] = df['State'].str.strip()
-    df['Percentage'] = pd.to_numeric(df['Percentage'], errors='coerce')
-    return df
-    
-# Map state names to abbreviations for choropleth map
-us_state_abbrev = {
-    'Alabama': 'AL', 'Alaska': 'AK', 'Arizona': 'AZ', 'Arkansas': 'AR', 'California': 'CA',
-    'Colorado': 'CO', 'Connecticut': 'CT', 'Delaware': 'DE', 'Florida': 'FL', 'Georgia': 'GA',
-    'Hawaii': 'HI', 'Idaho': 'ID', 'Illinois': 'IL', 'Indiana': 'IN', 'Iowa': 'IA',
-    'Kansas': 'KS', 'Kentucky': 'KY', 'Louisiana': 'LA', 'Maine': 'ME', 'Maryland': 'MD',
-    'Massachusetts': 'MA', 'Michigan': 'MI', 'Minnesota': 'MN', 'Mississippi': 'MS',
-    'Missouri': 'MO', 'Montana': 'MT', 'Nebraska': 'NE', 'Nevada': 'NV', 'New Hampshire': 'NH',
-    'New Jersey': 'NJ', 'New Mexico': 'NM', 'New York': 'NY', 'North Carolina': 'NC',
-    'North Dakota': 'ND', 'Ohio': 'OH', 'Oklahoma': 'OK', 'Oregon': 'OR', 'Pennsylvania': 'PA',
-    'Rhode Island': 'RI', 'South Carolina': 'SC', 'South Dakota': 'SD', 'Tennessee': 'TN',
-    'Texas': 'TX', 'Utah': 'UT', 'Vermont': 'VT', 'Virginia': 'VA', 'Washington': 'WA',
-    'West Virginia': 'WV', 'Wisconsin': 'WI', 'Wyoming': 'WY', 'District of Columbia': 'DC'
-}
-
-question_to_filename = {
-    "    🤝 Formal Volunteer": "volunteer/formalvolunteer",
-    "    💸 Charity Donations": "volunteer/charitabledonations",
-    
-    "    🍻 Alcohol drink within past 30 days": "alcohol drink/within last 30 days",
-    "    🍺 Binge drinkers (M 5+, F 4+ on one occasion)": "alcohol drink/Binge drinkers (males having five or more drinks on one occasion, females having four or more drinks on one occasion)",
-    "    🍷 Heavy drinkers (M 14+, F 7+ in one week)": "alcohol drink/Heavy drinkers (adult men having more than 14 drinks per week and adult women having more than 7 drinks per week)",
-    "    🍎 Consumed fruit at least one time per day": "fruit consumption/Consumed fruit less than one time per day (variable calculated from one or more BRFSS questions)",
-    "    🏃 Completed physical activity within past month": "physical activity/physical activity within past month",
-    "    💉 Adults aged 65+ w/ flu shot": "flu shot/Adults aged 65+ who have had a flu shot within the past year (variable calculated from one or more BRFSS questions)",
-    "    💉 Adults aged 65+ who have ever had a pneumonia vaccination": "pneumonia vaccination/Adults aged 65+ who have ever had a pneumonia vaccination (variable calculated from one or more BRFSS questions)",
-    "    ⚕️ Has it been 1 year since last visited a doctor for a routine checkup": "last physical checkup/1year since you last visited a doctor for a routine checkup",
-
-    "    🦴 Diagnosed with Arthritis": "chronic health indicators/arthritis",
-    "    😤 Diagnosed with Asthma": "chronic health indicators/asthma",
-    "    🧠 Diagnosed with Depression": "chronic health indicators/depression",
-    "    🩸 Diagnosed with Diabetes": "chronic health indicators/diabetes",
-    "    ❤️ Heart Attack (at least once)": "chronic health indicators/heart attack at least once",
-    "    🧠 Stroke (at least once)": "chronic health indicators/stroke at least once",
-
-    "    💳 Adults who had some form of health insurance": "health care insurance/Adults who had some form of health insurance (variable calculated from one or more BRFSS questions)",
-    "    🚫 Do not have a single personal health care provider": "personal health care provider/do not have a single personal health care provider",
-
-    "    💼 Employed": "employment status/employed",
-    "    🧑‍💼 Self-employed": "employment status/selfemployed",
-    "    🚫 Unable to work": "employment status/unable to work",
-    "    💍 Married Marital Status": "martial status/married",
-    "    👶 Kids (No kids)": "number of kids/no kids",
-    "    👶 Kids (1 kid)": "number of kids/one kid",
-    "    👶 Kids (2 kids)": "number of kids/two kid",
-    "    🎖️ Veteran Status": "veteran/no", #get reverse percentage
-
-    "    🏠 Home Ownership": "home ownership/do you own your home",
-    "    💰 Less than 15k": "household income/less than 15k",
-    "    💰 15k to 24k": "household income/15k to 24k",
-    "    💰 25k to 34k": "household income/25k to 34k",
-    "    💰 35k to 49k": "household income/35k to 49k",
-    "    💰 50k plus": "household income/more than 50k",
-
-    "    🧠 14 or more days when mental health status not good": "mental health days/14ormoreDays when mental health status not good (variable calculated from one or more BRFSS questions)",
-    "    💪 14 or more days when physical health status not good": "physical health days/14ormoreDays when physical health status not good (variable calculated from one or more BRFSS questions)"
-}
-
-# Load all 5 dataframes at the beginning
-all_data = load_data()
-
-st.title("📊 Visualization Levels by State")
-selected_year = st.selectbox("Select Year", sorted(all_data.keys()))
-
-# Layout: left spacer, right main panel
-left, right = st.columns([3, 3])
-
-with left:
-
-    selected_question = st.selectbox("Select Health/Lifestyle Indicator", list(question_to_filename.keys()))
-    filename = question_to_filename[selected_question]
-
-    df_health = load_health_stat(filename, selected_year)
-    df_health['Abbrev'] = df_health['State'].map(us_state_abbrev)
-    df_health = df_health.dropna(subset=['Abbrev', 'Percentage'])
-
-    fig_left = px.choropleth(
-        df_health,
-        locations='Abbrev',
-        locationmode='USA-states',
-        color='Percentage',
-        color_continuous_scale='Viridis',
-        scope='usa',
-        labels={'Percentage': '%'},
-        hover_name='State',
-        title=selected_question.strip(),
-    )
+    @st.cache_data
+    def load_health_stat(filename, year):
+        source_frames, sources = get_source_frames()
+        df = get_source_frame(source_frames, sources, filename, year)
+        if not isinstance(df, pd.DataFrame):
+            st.error(f"No data for {filename}_{year}.csv")
+            st.stop()
+        return df.copy()
 
-    fig_left.update_layout(
-        height=800,
-        margin={"r":0,"t":60,"l":0,"b":0}
-    )
+    @st.cache_data
+    def load_indicator_correlations():
+        # Every indicator x year x education group in one batched pass, shared with lumina.report
+        return indicator_statistics()
 
-    st.plotly_chart(fig_left, use_container_width=True)
-
-with right:
-    # User selects year and education group
-    edu_group = st.selectbox("Select Education Group", ["College+", "Less than College"])
-
-    # Filter to selected year
-    df_selected = all_data[selected_year].copy()
-    df_selected['State'] = df_selected['State'].str.strip()
-    df_selected['Education Level'] = df_selected['Education Level'].str.strip()
-    df_selected['Percentage'] = pd.to_numeric(df_selected['Percentage'], errors='coerce')
-
-    if edu_group == "College+":
-        df_edu = df_selected[df_selected['Education Level'] == "College+"].copy()
-    else:
-        # Sum of the three "less than college" levels per state
-        df_less = df_selected[df_selected['Education Level'].isin([
-            "Less than H.S.", "H.S. or G.E.D.", "Some post-H.S."
-        ])].copy()
-
-        df_edu = df_less.groupby("State", as_index=False)['Percentage'].sum()
-        df_edu['Education Level'] = "Less than College"
-
-    # Add abbreviations
-    df_edu['Abbrev'] = df_edu['State'].map(us_state_abbrev)
-    df_edu = df_edu.dropna(subset=['Abbrev', 'Percentage'])
-
-    # Plot heatmap
-    fig = px.choropleth(
-        df_edu,
-        locations='Abbrev',
-        locationmode='USA-states',
-        color='Percentage',
-        color_continuous_scale='YlOrRd',
-        scope='usa',
-        labels={'Percentage': f'% {edu_group}'},
-        hover_name='State',
-        title=f"{edu_group} Attainment in {selected_year}",
-        height=800,
-        width=1000
-    )
+    @st.cache_data
+    @persistent
+    def load_resampled_regression(x, y, n_resamples):
+        # Keyed on the plotted points, i.e. per (indicator, year, education group)
+        return resampled_regression(x, y, n_resamples=n_resamples)
+
+    @st.cache_data
+    @persistent
+    def load_indicator_wls(weighting, covariates, robust):
+        # Every indicator x year x education group, fitted as one batch
+        store_df, _ = get_store_frame()
+        return indicator_wls(store_df, QUESTION_TO_FILENAME, weighting, covariates, robust)
+
+    @st.cache_resource
+    def load_animated_indicator_map(filename, title):
+        # Built once per indicator; shared read-only, copied by start_at_frame
+        store_df, _ = get_store_frame()
+        return animated_indicator_map(store_df, filename, title)
+
+    @st.cache_resource
+    def load_animated_education_map(edu_group):
+        store_df, _ = get_store_frame()
+        return animated_education_map(store_df, edu_group)
+
+    @st.cache_data
+    @persistent
+    def load_education_share(year, edu_group):
+        df_selected = load_data()[year]
+
+        if edu_group == "College+":
+            df_edu = df_selected[df_selected['Education Level'] == "College+"].copy()
+        else:
+            # Sum of the three "less than college" levels per state
+            df_less = df_selected[df_selected['Education Level'].isin([
+                "Less than H.S.", "H.S. or G.E.D.", "Some post-H.S."
+            ])].copy()
+
+            df_edu = df_less.groupby("State", as_index=False, observed=True)['Percentage'].sum()
+            df_edu['Education Level'] = "Less than College"
+
+        # Add abbreviations
+        return with_abbrev(df_edu)
+
+    # Panels below are fragments. Each selector reruns only the panels that read it;
+    # the year and the animation toggle stay outside and rerun the whole page.
+    rerun_for_indicator = rerun_panels("indicator_map", "regression")
+    rerun_for_education = rerun_panels("education_map", "regression", "ranking")
+    rerun_regression = rerun_panels("regression")
+
+    @st.fragment(key="indicator_map")
+    @debug.panel("indicator panel")
+    def indicator_panel(selected_year, animate_years):
+        selected_question = st.selectbox("Select Health/Lifestyle Indicator", list(QUESTION_TO_FILENAME.keys()),
+                                         key="indicator", on_change=rerun_for_indicator)
+        filename = QUESTION_TO_FILENAME[selected_question]
+
+        with stage("indicator figure"):
+            if animate_years:
+                fig_left = start_at_frame(load_animated_indicator_map(filename, selected_question.strip()), str(selected_year))
+            else:
+                df_health = with_abbrev(load_health_stat(filename, selected_year))
+                fig_left = indicator_map(df_health, selected_question.strip())
+
+        debug.plotly_chart(fig_left, "indicator map", width="stretch")
+
+    @st.fragment(key="education_map")
+    @debug.panel("education panel")
+    def education_panel(selected_year, animate_years):
+        # User selects year and education group
+        edu_group = st.selectbox("Select Education Group", ["College+", "Less than College"],
+                                 key="edu_group", on_change=rerun_for_education)
+
+        # Plot heatmap
+        with stage("education figure"):
+            if animate_years:
+                fig = start_at_frame(load_animated_education_map(edu_group), str(selected_year))
+            else:
+                fig = education_map(load_education_share(selected_year, edu_group), edu_group,
+                                    f"{edu_group} Attainment in {selected_year}")
+
+        debug.plotly_chart(fig, "education map", width="stretch")
+
+    @st.fragment(key="regression")
+    @debug.panel("regression panel")
+    def regression_panel(selected_year):
+        selected_question = st.session_state["indicator"]
+        edu_group = st.session_state["edu_group"]
+        filename = QUESTION_TO_FILENAME[selected_question]
+
+        df_health = with_abbrev(load_health_stat(filename, selected_year))
+        df_edu = load_education_share(selected_year, edu_group)
+
+        st.header("📉 Relationship Between Indicator and Education Level")
+
+        df_combined = pd.merge(df_health, df_edu, on="State")
+        df_combined = df_combined.rename(columns={
+            'Percentage_x': 'Health_Percentage',
+            'Percentage_y': 'Education_Percentage'
+        })
 
-    st.plotly_chart(fig, use_container_width=True)
-
-with st.container():
-    st.header("📉 Relationship Between Indicator and Education Level")
-
-    df_combined = pd.merge(df_health, df_edu, on="State")
-    df_combined = df_combined.rename(columns={
-        'Percentage_x': 'Health_Percentage',
-        'Percentage_y': 'Education_Percentage'
-    })
-
-    fig_combined = px.scatter(
-        df_combined,
-        x="Health_Percentage",
-        y="Education_Percentage",
-        hover_name="State",
-        labels={
-            "Health_Percentage": selected_question.strip(),
-            "Education_Percentage": f"% {edu_group}"
-        },
-        title=f"Correlation between '{selected_question.strip()}' and Education in {selected_year}"
-        # ⛔ trendline removed
+        with stage("regression figure"):
+            fig_combined = regression_figure(df_combined, selected_question.strip(), edu_group, selected_year)
+
+        # Calculate correlation coefficient
+        corr = np.corrcoef(
+            df_combined["Health_Percentage"],
+            df_combined["Education_Percentage"]
+        )[0, 1]
+        st.write(f"Pearson correlation: **{corr:.2f}**")
+
+        x = df_combined["Health_Percentage"]
+        y = df_combined["Education_Percentage"]
+        line_x = np.linspace(x.min(), x.max(), 100)
+
+        # Weighted fit for this view, taken from the batched run over all indicators
+        with st.expander("⚖️ Weighted regression (WLS)"):
+            weighting = st.selectbox("Weights", list(WEIGHTINGS), on_change=rerun_regression)
+            covariates = st.multiselect("Covariates", list(INCOME_COVARIATES), on_change=rerun_regression)
+            robust = st.checkbox("Robust (HC1) standard errors", value=True, on_change=rerun_regression)
+            show_weighted_fit = st.checkbox("Draw weighted fit on the scatter plot", value=True, on_change=rerun_regression)
+
+            with stage("weighted regression"):
+                wls_coefs, wls_fits = load_indicator_wls(WEIGHTINGS[weighting], tuple(covariates), robust)
+            in_view = lambda frame: frame[
+                (frame["Year"] == selected_year)
+                & (frame["Education Group"] == edu_group)
+                & (frame["Indicator"] == selected_question.strip())
+            ]
+            view_coefs = in_view(wls_coefs).set_index("term")
+            view_fit = in_view(wls_fits)
+
+            if view_fit.empty or view_coefs["coef"].isna().all():
+                st.warning("The weighted model cannot be fitted for this view (too few points or collinear covariates).")
+                show_weighted_fit = False
+            else:
+                view_fit = view_fit.iloc[0]
+                debug.dataframe(
+                    view_coefs[["coef", "std_err", "stat", "p_value"]],
+                    "wls coefficients",
+                    width="stretch",
+                    column_config={
+                        "coef": st.column_config.NumberColumn("Coefficient", format="%.3f"),
+                        "std_err": st.column_config.NumberColumn("Std. error", format="%.3f"),
+                        "stat": st.column_config.NumberColumn("z" if robust else "t", format="%.2f"),
+                        "p_value": st.column_config.NumberColumn("p-value", format="%.2e"),
+                    },
+                )
+                st.write(f"R²: **{view_fit['r2']:.3f}** · adjusted R²: **{view_fit['adj_r2']:.3f}** · points: **{view_fit['n']}**")
+
+                if st.checkbox("Show full statsmodels summary for this view", on_change=rerun_regression):
+                    store_df, _ = get_store_frame()
+                    view_pairs = regression_frame(store_df, {selected_question: filename}, covariates)
+                    view_pairs = view_pairs[(view_pairs["Year"] == selected_year) & (view_pairs["Education Group"] == edu_group)]
+                    st.text(single_wls(view_pairs, WEIGHTINGS[weighting], covariates, robust).summary().as_text())
+
+                all_views = wls_coefs[
+                    (wls_coefs["Year"] == selected_year)
+                    & (wls_coefs["Education Group"] == edu_group)
+                    & (wls_coefs["term"] == "Health_Percentage")
+                ]
+                st.markdown("**Indicator slope across all indicators** (same weights and covariates)")
+                debug.dataframe(
+                    all_views.assign(abs_stat=all_views["stat"].abs())
+                    .sort_values("abs_stat", ascending=False)[["Indicator", "coef", "std_err", "p_value"]],
+                    "wls all indicators",
+                    hide_index=True,
+                    width="stretch",
+                    column_config={
+                        "coef": st.column_config.NumberColumn("Slope", format="%.3f"),
+                        "std_err": st.column_config.NumberColumn("Std. error", format="%.3f"),
+                        "p_value": st.column_config.NumberColumn("p-value", format="%.2e"),
+                    },
+                )
+
+        if show_weighted_fit:
+            # Covariates are held at their weighted means
+            weighted_y = view_coefs.loc["Intercept", "coef"] + view_coefs.loc["Health_Percentage", "coef"] * line_x
+            for covariate in covariates:
+                weighted_y = weighted_y + view_coefs.loc[covariate, "coef"] * view_fit[f"mean {covariate}"]
+            fig_combined.add_scatter(x=line_x, y=weighted_y, mode="lines", name=f"Weighted Fit ({weighting})",
+                                     line=dict(color="green", dash="dash"))
+
+        debug.plotly_chart(fig_combined, "regression scatter")
+
+        if st.checkbox("Show bootstrap and permutation uncertainty for r and slope", on_change=rerun_regression):
+            n_resamples = st.select_slider("Resamples", options=[1000, 2000, 5000, 10000], value=10000,
+                                           on_change=rerun_regression)
+            with stage("resampling"):
+                uncertainty = load_resampled_regression(x.to_numpy(), y.to_numpy(), n_resamples)
+            debug.dataframe(
+                uncertainty,
+                "resampling",
+                width="stretch",
+                column_config={
+                    "estimate": st.column_config.NumberColumn("Estimate", format="%.3f"),
+                    "bootstrap_low": st.column_config.NumberColumn("Bootstrap 95% low", format="%.3f"),
+                    "bootstrap_high": st.column_config.NumberColumn("Bootstrap 95% high", format="%.3f"),
+                    "null_low": st.column_config.NumberColumn("Permutation null 2.5%", format="%.3f"),
+                    "null_high": st.column_config.NumberColumn("Permutation null 97.5%", format="%.3f"),
+                    "permutation_p": st.column_config.NumberColumn("Permutation p", format="%.4f"),
+                },
+            )
+            st.caption(f"{n_resamples:,} resamples of the {len(x)} points above.")
+
+    @st.fragment(key="ranking")
+    @debug.panel("ranking panel")
+    def ranking_panel(selected_year):
+        edu_group = st.session_state["edu_group"]
+
+        st.header("🏆 Indicators Ranked by Correlation with Education Level")
+        st.caption(f"All indicators for {edu_group} in {selected_year}, sorted by |r|. Click a column header to re-sort.")
+
+        with stage("indicator correlations"):
+            ranking = load_indicator_correlations()
+        ranking = ranking[(ranking["Year"] == selected_year) & (ranking["Education Group"] == edu_group)]
+        ranking = ranking.assign(abs_r=ranking["r"].abs()).sort_values("abs_r", ascending=False)
+
+        debug.dataframe(
+            ranking[["Indicator", "r", "slope", "intercept", "p_value", "n"]],
+            "ranking",
+            hide_index=True,
+            width="stretch",
+            column_config={
+                "r": st.column_config.NumberColumn("Pearson r", format="%.2f"),
+                "slope": st.column_config.NumberColumn("Slope", format="%.3f"),
+                "intercept": st.column_config.NumberColumn("Intercept", format="%.2f"),
+                "p_value": st.column_config.NumberColumn("p-value", format="%.2e"),
+                "n": st.column_config.NumberColumn("Points"),
+            },
+        )
+
+    # Load all 5 dataframes at the beginning
+    with stage("load education data"):
+        all_data = load_data()
+
+    st.title("📊 Visualization Levels by State")
+    selected_year = st.selectbox("Select Year", sorted(all_data.keys()))
+    animate_years = st.toggle(
+        "Year slider inside the maps",
+        help="Loads every year into each map once so years can be switched in the browser without reloading the page. "
+             "The year selected above still drives the regression below.",
     )
 
-    # Calculate correlation coefficient
-    corr = np.corrcoef(
-        df_combined["Health_Percentage"],
-        df_combined["Education_Percentage"]
-    )[0, 1]
-    st.write(f"Pearson correlation: **{corr:.2f}**")
-    
-    # Fit linear regression manually
-    x = df_combined["Health_Percentage"]
-    y = df_combined["Education_Percentage"]
-    slope, intercept = np.polyfit(x, y, 1)
-    line_x = np.linspace(x.min(), x.max(), 100)
-    line_y = slope * line_x + intercept
-    
-    # Add regression line
-    fig_combined.add_scatter(x=line_x, y=line_y, mode="lines", name="Regression Line", line=dict(color="red"))
-    
-    fig_combined.update_traces(marker=dict(size=12, color="blue"))
-    fig_combined.update_layout(height=600)
-    st.plotly_chart(fig_combined)
-    
-# --- FOOTER ---
-st.markdown("---")
-st.caption("M. Abdalla 2025, Demo developed by affiliates of Harvard Medical School and Massachusetts General Hospital")
+    # Layout: left spacer, right main panel
+    left, right = st.columns([3, 3])
+
+    with left:
+        indicator_panel(selected_year, animate_years)
+
+    with right:
+        education_panel(selected_year, animate_years)
+
+    with st.container():
+        regression_panel(selected_year)
+
+    with st.container():
+        ranking_panel(selected_year)
+
+    # --- FOOTER ---
+    st.markdown("---")
+    st.caption("M. Abdalla 2025, Demo developed by affiliates of Harvard Medical School and Massachusetts General Hospital")
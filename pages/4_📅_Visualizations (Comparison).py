@@ -1,145 +1,233 @@
 import streamlit as st
 import pandas as pd
-from pathlib import Path
 import plotly.express as px
+import time
+
+from lumina import debug, metrics
+from lumina.colors import COLOR_PATTERN, PALETTES, apply_overrides, assign_colors
+from lumina.comparison import (
+    LARGE_DATA_KEYS, LARGE_DATA_POINTS, SUMMARIES, consolidated_figure, figure_report, is_large, query_selection,
+    selection_options, summarize,
+)
+from lumina.dataset import get_loaded_data, get_query_backend
+from lumina.panels import paged_dataframe, rerun_panels
+from lumina.payload import compact_figure
 
 st.set_page_config(page_title="Visualizations (Comparison)", layout="wide")
 st.title("📅 Visualizations (Comparison)")
+with debug.recording("Comparison"):
+    # Shared across sessions; loads on first use if no page has triggered it yet
+    with st.spinner("Loading survey data..."), metrics.stage("load dataset"):
+        loaded_data = get_loaded_data()
 
-# Check if "loaded_data" exists and is not empty
-if "loaded_data" not in st.session_state or st.session_state["loaded_data"] is None:
-    st.info("ℹ️ No data loaded. Please navigate to Raw Data Validation (on the left hand selection).")
-else:
-    loaded_data = st.session_state["loaded_data"]
-
-# --- Sidebar for options ---
-st.sidebar.header("🔧 Visualization Settings")
+    # --- Sidebar for options ---
+    st.sidebar.header("🔧 Visualization Settings")
 
-# --- Select Multiple Questions ---
-selected_questions = st.sidebar.multiselect("📋 Data Categories", list(loaded_data.keys()), default=[list(loaded_data.keys())[0]])
+    # --- Select Multiple Questions ---
+    selected_questions = st.sidebar.multiselect("📋 Data Categories", list(loaded_data.keys()), default=[list(loaded_data.keys())[0]])
 
-# --- Select Years (multiple) ---
-available_years = sorted(
-    list({year for q in selected_questions for year in loaded_data[q].keys() if isinstance(loaded_data[q][year], pd.DataFrame)}),
-    reverse=True
-)
-selected_years = st.sidebar.multiselect("📅 Choose Year(s)", available_years, default=[available_years[0]])
-
-# --- Select Chart Type ---
-chart_type = st.sidebar.selectbox("📊 Choose Chart Type", ["Bar", "Line", "Scatter"])
-
-# --- Load and combine data for selected questions and years ---
-df_list = []
-for question in selected_questions:
-    for year in selected_years:
-        if year in loaded_data[question]:
-            df = loaded_data[question][year].copy()
-            df["Year"] = year
-            df["Question"] = question
-            df_list.append(df)
-if not df_list:
-    st.warning("No data available for the selected questions and years.")
-    st.stop()
-
-df = pd.concat(df_list, ignore_index=True)
-
-# --- Optional filters ---
-all_states = sorted(df["State"].unique())
-all_edu_levels = sorted(df["Education Level"].unique())
-
-selected_states = st.sidebar.multiselect("🌎 Filter by States", all_states, default=all_states)
-selected_edu_levels = st.sidebar.multiselect("🎓 Filter by Education Level", all_edu_levels, default=all_edu_levels)
-
-# --- Color picker for each (Question, Year, Education Level) combination ---
-default_colors = px.colors.qualitative.Plotly
-color_map = {}
-
-st.sidebar.markdown("### 🎨 Pick colors for each Question-Year-Education combination")
-
-# Create a combined column for coloring
-df["ColorKey"] = df["Question"] + " | " + df["Year"].astype(str) + " - " + df["Education Level"]
-
-# Get unique combinations in filtered data
-unique_combinations = df[
-    df["State"].isin(selected_states) &
-    df["Education Level"].isin(selected_edu_levels)
-]["ColorKey"].unique()
-
-for i, combo in enumerate(sorted(unique_combinations)):
-    default_color = default_colors[i % len(default_colors)]
-    color_map[combo] = st.sidebar.color_picker(f"{combo}", default_color, key=f"color_{combo}")
-
-# --- Axis selectors ---
-axis_x = st.sidebar.selectbox("📊 X-Axis", ["State", "Percentage", "Year", "Education Level"])
-axis_y = st.sidebar.selectbox("📈 Y-Axis", ["Percentage", "State", "Year", "Education Level"])
-
-# --- Filter Data ---
-filtered_df = df[
-    df["State"].isin(selected_states) &
-    df["Education Level"].isin(selected_edu_levels)
-].copy()
-
-if filtered_df.empty:
-    st.warning("No data available for the selected filters.")
-    st.stop()
-
-# --- Plot chart ---
-years_str = ", ".join(str(y) for y in selected_years)
-questions_str = ", ".join(selected_questions)
-st.subheader(f"{questions_str} ({years_str})")
-chart_title = f"{axis_y} by {axis_x}"
-
-# Plot using ColorKey (Question + Year + Education Level)
-if chart_type == "Bar":
-    fig = px.bar(
-        filtered_df,
-        x=axis_x,
-        y=axis_y,
-        color="ColorKey",
-        color_discrete_map=color_map,
-        hover_data=["Question", "State", "Education Level", "Year", "Percentage"],
-        barmode='group',
-        title=chart_title
-    )
-elif chart_type == "Line":
-    fig = px.line(
-        filtered_df,
-        x=axis_x,
-        y=axis_y,
-        color="ColorKey",
-        color_discrete_map=color_map,
-        markers=True,
-        hover_data=["Question", "State", "Education Level", "Year", "Percentage"],
-        title=chart_title
-    )
-elif chart_type == "Scatter":
-    fig = px.scatter(
-        filtered_df,
-        x=axis_x,
-        y=axis_y,
-        color="ColorKey",
-        color_discrete_map=color_map,
-        hover_data=["Question", "State", "Education Level", "Year", "Percentage"],
-        title=chart_title
+    # --- Select Years (multiple) ---
+    available_years = sorted(
+        list({year for q in selected_questions for year in loaded_data[q].keys() if isinstance(loaded_data[q][year], pd.DataFrame)}),
+        reverse=True
     )
-else:
-    st.error("Unsupported chart type selected.")
-    st.stop()
-
-fig.update_layout(xaxis_title=axis_x, yaxis_title=axis_y)
-st.plotly_chart(fig, use_container_width=True)
-
-# --- Optional data preview ---
-with st.expander("📄 Show Table"):
-    preview_df = filtered_df.drop(columns=["n"], errors="ignore").copy()
-    # Move 'Year' and 'Question' to the front
-    cols = preview_df.columns.tolist()
-    for col in ["Question", "Year"]:
-        if col in cols:
-            cols.insert(0, cols.pop(cols.index(col)))
-    preview_df = preview_df[cols]
-    st.dataframe(preview_df, use_container_width=True)
-
-# --- FOOTER ---
-st.markdown("---")
-st.caption("M. Abdalla 2025, Demo developed by affiliates of Harvard Medical School and Massachusetts General Hospital")
+    selected_years = st.sidebar.multiselect("📅 Choose Year(s)", available_years, default=[available_years[0]])
+
+    # --- Optional filters ---
+    # Options and rows come from the query backend (see lumina.query), so a
+    # filter change runs one filtered query instead of a concat and a scan.
+    @st.cache_data
+    def load_options(selected_questions, selected_years):
+        return selection_options(get_query_backend(), selected_questions, selected_years)
+
+    @st.cache_data(max_entries=64)
+    def load_selection(selected_questions, selected_years, states, levels):
+        return query_selection(get_query_backend(), selected_questions, selected_years, states, levels)
+
+    with metrics.stage("query options"):
+        all_states, all_edu_levels = load_options(tuple(selected_questions), tuple(selected_years))
+    if not all_states:
+        st.warning("No data available for the selected questions and years.")
+        st.stop()
+
+    selected_states = st.sidebar.multiselect("🌎 Filter by States", all_states, default=all_states)
+    selected_edu_levels = st.sidebar.multiselect("🎓 Filter by Education Level", all_edu_levels, default=all_edu_levels)
+
+    # --- Filter Data ---
+    # None: everything is selected, so that column needs no filter
+    with metrics.stage("query selection"):
+        filtered_df = load_selection(
+            tuple(selected_questions),
+            tuple(selected_years),
+            None if len(selected_states) == len(all_states) else tuple(selected_states),
+            None if len(selected_edu_levels) == len(all_edu_levels) else tuple(selected_edu_levels),
+        )
+
+    if filtered_df is None:
+        st.warning("No data available for the selected filters.")
+        st.stop()
+
+    # --- Chart panel ---
+    # A fragment: chart type, axes and colors only redraw the chart, while the
+    # sidebar selections above rerun the page and rebuild the data.
+    rerun_chart = rerun_panels("chart")
+
+    COLOR_DIMENSIONS = {
+        "Question | Year - Education Level": "ColorKey",
+        "Question": "Question",
+        "Year": "Year",
+        "Education Level": "Education Level",
+    }
+
+    def save_color_overrides(editor_key, values, dimension):
+        # Fold the edits into the stored overrides, then start a fresh editor
+        # with them baked in so edited row positions never go stale.
+        overrides = st.session_state.setdefault("color_overrides", {})
+        for row, change in st.session_state[editor_key]["edited_rows"].items():
+            if "Color" not in change:
+                continue
+            if change["Color"]:
+                overrides[(dimension, values[row])] = change["Color"]
+            else:
+                overrides.pop((dimension, values[row]), None)
+        st.session_state["color_editor_version"] = st.session_state.get("color_editor_version", 0) + 1
+        st.rerun(["chart"])
+
+    @st.fragment(key="chart")
+    @debug.panel("chart panel")
+    def chart_panel(filtered_df, selected_questions, selected_years):
+        years_str = ", ".join(str(y) for y in selected_years)
+        questions_str = ", ".join(selected_questions)
+        st.subheader(f"{questions_str} ({years_str})")
+
+        # --- Chart type and axis selectors ---
+        type_col, x_col, y_col = st.columns(3)
+        chart_type = type_col.selectbox("📊 Choose Chart Type", ["Bar", "Line", "Scatter"], on_change=rerun_chart)
+        axis_x = x_col.selectbox("📊 X-Axis", ["State", "Percentage", "Year", "Education Level"], on_change=rerun_chart)
+        axis_y = y_col.selectbox("📈 Y-Axis", ["Percentage", "State", "Year", "Education Level"], on_change=rerun_chart)
+
+        # --- Large selections: server-side summary and WebGL rendering ---
+        summary_col, render_col = st.columns(2)
+        summary = summary_col.selectbox("🧮 Summarize", list(SUMMARIES), on_change=rerun_chart)
+        rendering = render_col.selectbox(
+            "⚡ Rendering", ["Auto", "Standard", "Large data (WebGL)"], on_change=rerun_chart,
+            help=f"Auto switches to large-data rendering above {LARGE_DATA_POINTS:,} points or {LARGE_DATA_KEYS} color keys: "
+                 "one WebGL trace per color instead of one trace per key.",
+        )
+        with metrics.stage("summarize"):
+            plot_df = summarize(filtered_df, summary)
+
+        # --- Colors: one palette over the chosen dimension, overrides in one editor ---
+        with st.expander("🎨 Colors"):
+            palette_col, dimension_col = st.columns(2)
+            palette_name = palette_col.selectbox("Palette", list(PALETTES), on_change=rerun_chart)
+            color_by = dimension_col.selectbox("Color by", list(COLOR_DIMENSIONS), on_change=rerun_chart)
+            dimension = COLOR_DIMENSIONS[color_by]
+
+            color_values = plot_df[dimension].astype(str)
+            overrides = {
+                value: color for (dim, value), color in st.session_state.get("color_overrides", {}).items()
+                if dim == dimension
+            }
+            color_map = apply_overrides(assign_colors(color_values, palette_name), overrides)
+
+            values = list(color_map)
+            editor_key = f"color_editor_{st.session_state.get('color_editor_version', 0)}"
+            st.data_editor(
+                pd.DataFrame({color_by: values, "Color": list(color_map.values())}),
+                key=editor_key,
+                hide_index=True,
+                disabled=[color_by],
+                width="stretch",
+                column_config={
+                    "Color": st.column_config.TextColumn(
+                        "Color", validate=COLOR_PATTERN,
+                        help="#rrggbb or rgb(r, g, b). Clear a cell to go back to the palette color.",
+                    ),
+                },
+                on_change=save_color_overrides,
+                args=(editor_key, values, dimension),
+            )
+
+        chart_title = f"{axis_y} by {axis_x}"
+
+        # Plot colored by the chosen dimension
+        plot_df = plot_df.assign(Color=color_values)
+        large_data = rendering == "Large data (WebGL)" or (rendering == "Auto" and is_large(plot_df, "Color"))
+        start = time.perf_counter()
+        if large_data:
+            fig = consolidated_figure(plot_df, chart_type, axis_x, axis_y,
+                                      plot_df["Color"].map(color_map), plot_df["Color"], chart_title)
+            fig.update_layout(legend_title_text=color_by)
+        elif chart_type == "Bar":
+            fig = px.bar(
+                plot_df,
+                x=axis_x,
+                y=axis_y,
+                color="Color",
+                color_discrete_map=color_map,
+                hover_data=["Question", "State", "Education Level", "Year", "Percentage"],
+                barmode='group',
+                labels={"Color": color_by},
+                title=chart_title
+            )
+        elif chart_type == "Line":
+            fig = px.line(
+                plot_df,
+                x=axis_x,
+                y=axis_y,
+                color="Color",
+                color_discrete_map=color_map,
+                markers=True,
+                hover_data=["Question", "State", "Education Level", "Year", "Percentage"],
+                labels={"Color": color_by},
+                title=chart_title
+            )
+        else:
+            fig = px.scatter(
+                plot_df,
+                x=axis_x,
+                y=axis_y,
+                color="Color",
+                color_discrete_map=color_map,
+                hover_data=["Question", "State", "Education Level", "Year", "Percentage"],
+                labels={"Color": color_by},
+                title=chart_title
+            )
+
+        fig.update_layout(xaxis_title=axis_x, yaxis_title=axis_y)
+        compact_figure(fig)
+        # Serializing just to size the figure costs as much as sending it; only do it for the metrics
+        report = figure_report(fig, time.perf_counter() - start, measure_payload=metrics.ENABLED)
+        metrics.add_stage("chart figure", report["build_ms"] / 1000)
+        if report["payload_bytes"] is not None:
+            metrics.add_payload("figure", "chart", report["payload_bytes"])
+        with metrics.stage("render chart"):
+            st.plotly_chart(fig, use_container_width=True)
+        details = [
+            f"{'Large-data' if large_data else 'Standard'} rendering",
+            f"{report['points']:,} points",
+            f"{report['traces']} traces",
+        ]
+        if report["payload_bytes"] is not None:
+            details.append(f"{report['payload_bytes'] / 1024:,.0f} KB figure")
+        details.append(f"built in {report['build_ms']:.0f} ms")
+        st.caption(" · ".join(details))
+
+    chart_panel(filtered_df, selected_questions, selected_years)
+
+    # --- Optional data preview ---
+    with st.expander("📄 Show Table"):
+        # ColorKey only drives the chart colors
+        preview_df = filtered_df.drop(columns=["n", "ColorKey"], errors="ignore").copy()
+        # Move 'Year' and 'Question' to the front
+        cols = preview_df.columns.tolist()
+        for col in ["Question", "Year"]:
+            if col in cols:
+                cols.insert(0, cols.pop(cols.index(col)))
+        preview_df = preview_df[cols]
+        paged_dataframe(preview_df, "preview", key="preview_page", width="stretch")
+
+    # --- FOOTER ---
+    st.markdown("---")
+    st.caption("M. Abdalla 2025, Demo developed by affiliates of Harvard Medical School and Massachusetts General Hospital")
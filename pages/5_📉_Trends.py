@@ -0,0 +1,89 @@
+import streamlit as st
+
+from lumina import debug
+from lumina.cache import persistent
+from lumina.catalog import DIRECTIONS, QUESTION_TO_FILENAME, YEARS
+from lumina.dataset import get_store_frame
+from lumina.figures import delta_map, with_abbrev
+from lumina.metrics import stage
+from lumina.trends import fastest_movers, indicator_trends
+
+st.set_page_config(page_title="Trends", layout="wide")
+st.title(f"📉 Trends {YEARS[0]}–{YEARS[-1]}")
+with debug.recording("Trends"):
+    @st.cache_data
+    @persistent
+    def load_trends():
+        # Every indicator x state x education level, fitted in one batch
+        store_df, _ = get_store_frame()
+        return indicator_trends(store_df, QUESTION_TO_FILENAME)
+
+    with stage("load trends"):
+        trends = load_trends()
+
+    # --- Sidebar ---
+    st.sidebar.header("🔧 Trend Settings")
+    selected_question = st.sidebar.selectbox("Select Health/Lifestyle Indicator", list(QUESTION_TO_FILENAME.keys()))
+    indicator = selected_question.strip()
+    direction = DIRECTIONS.get(QUESTION_TO_FILENAME[selected_question], 1)
+
+    levels = sorted(trends.loc[trends["Indicator"] == indicator, "Education Level"].unique())
+    selected_level = st.sidebar.selectbox("Select Education Level", levels)
+
+    # Label -> (trend column, legend label)
+    MAP_METRICS = {
+        "Trend (points per year)": ("slope", "pts/yr"),
+        f"Change {YEARS[0]}–{YEARS[-1]}": ("change", "Δ pts"),
+        **{f"Change {year - 1}–{year}": (f"{year} Δ", "Δ pts") for year in YEARS[1:]},
+    }
+    selected_metric = st.sidebar.selectbox("Map", list(MAP_METRICS))
+    column, label = MAP_METRICS[selected_metric]
+
+    view = trends[(trends["Indicator"] == indicator) & (trends["Education Level"] == selected_level)]
+
+    # --- Delta choropleth ---
+    with stage("delta map figure"):
+        fig = delta_map(with_abbrev(view, column), column, label, f"{indicator} ({selected_level}): {selected_metric}",
+                        lower_is_better=direction < 0)
+    debug.plotly_chart(fig, "delta map", width="stretch")
+    if direction == 0:
+        st.caption("Neither direction is better for this indicator; blue marks rising values.")
+
+    # --- Fastest movers ---
+    with stage("fastest movers"):
+        improving, worsening = fastest_movers(trends, indicator, selected_level)
+    column_config = {
+        "slope": st.column_config.NumberColumn("Trend (pts/yr)", format="%.2f"),
+        "change": st.column_config.NumberColumn(f"Change {YEARS[0]}–{YEARS[-1]}", format="%.1f"),
+        "first": st.column_config.NumberColumn("First", format="%.1f"),
+        "last": st.column_config.NumberColumn("Last", format="%.1f"),
+        "r2": st.column_config.NumberColumn("R²", format="%.2f"),
+        "p_value": st.column_config.NumberColumn("p-value", format="%.3f"),
+        "n_years": st.column_config.NumberColumn("Years"),
+    }
+    mover_columns = ["State", "slope", "change", "first", "last", "r2", "p_value", "n_years"]
+
+    left, right = st.columns(2)
+    with left:
+        st.subheader("🟢 Fastest improving" if direction else "⬆️ Fastest rising")
+        debug.dataframe(improving[mover_columns], "improving", hide_index=True, width="stretch",
+                        column_config=column_config)
+    with right:
+        st.subheader("🔴 Fastest worsening" if direction else "⬇️ Fastest falling")
+        debug.dataframe(worsening[mover_columns], "worsening", hide_index=True, width="stretch",
+                        column_config=column_config)
+    st.caption("States with at least three years of data, ranked by their least-squares trend.")
+
+    with st.expander("📋 All states"):
+        delta_columns = [f"{year} Δ" for year in YEARS[1:]]
+        debug.dataframe(
+            view[mover_columns + delta_columns].sort_values("slope"),
+            "all states",
+            hide_index=True,
+            width="stretch",
+            column_config={**column_config, **{col: st.column_config.NumberColumn(col, format="%.1f") for col in delta_columns}},
+        )
+
+    # --- FOOTER ---
+    st.markdown("---")
+    st.caption("M. Abdalla 2025, Demo developed by affiliates of Harvard Medical School and Massachusetts General Hospital")
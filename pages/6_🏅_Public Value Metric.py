@@ -0,0 +1,113 @@
+import time
+
+import numpy as np
+import streamlit as st
+
+from lumina import debug, metrics
+from lumina.cache import persistent
+from lumina.catalog import CATEGORIES, QUESTION_TO_FILENAME
+from lumina.composite import (
+    MIN_COVERAGE, NORMALIZATIONS, REVERSE_CODED, composite_scores, default_weights, normalized_matrices, ranked_scores,
+)
+from lumina.dataset import get_store_frame
+from lumina.figures import score_map, with_abbrev
+
+st.set_page_config(page_title="Public Value Metric", layout="wide")
+st.title("🏅 Public Value Metric")
+with debug.recording("Public Value Metric"):
+    st.caption(
+        "Every indicator is normalized within each year and combined with the weights below into one score per "
+        "state and education level. Indicators where a lower share is better are reverse-coded (⇅)."
+    )
+
+    @st.cache_data
+    @persistent
+    def load_matrices(method):
+        # Normalized once per method; reweighting only multiplies these
+        store_df, _ = get_store_frame()
+        return normalized_matrices(store_df, QUESTION_TO_FILENAME, method)
+
+    # --- Sidebar ---
+    st.sidebar.header("🔧 Score Settings")
+    method = st.sidebar.radio(
+        "Normalization", NORMALIZATIONS,
+        help="z-score: distance from the year's mean in standard deviations. min-max: position between the year's "
+             "lowest (0) and highest (1) value.",
+    )
+    with metrics.stage("load matrices"):
+        matrices = load_matrices(method)
+    years = sorted(matrices["rows"]["Year"].unique())
+    selected_year = st.sidebar.selectbox("Select Year", years, index=len(years) - 1)
+
+    # Levels that score under the default weights; stray labels in a few
+    # source files only cover one or two indicators.
+    default_scores = composite_scores(matrices, default_weights(matrices["filenames"]))
+    scored = default_scores[default_scores["Year"] == selected_year].dropna(subset=["Score"])
+    selected_level = st.sidebar.selectbox("Select Education Level", sorted(scored["Education Level"].unique()))
+
+    # --- Weights and score ---
+    def weight_key(filename):
+        return f"weight_{filename}"
+
+    def reset_weights():
+        for filename, weight in zip(matrices["filenames"], default_weights(matrices["filenames"])):
+            st.session_state[weight_key(filename)] = float(weight)
+
+    # A fragment: moving a weight only reruns the scoring below, one
+    # matrix-vector product over the cached matrices.
+    @st.fragment(key="score")
+    @debug.panel("score panel")
+    def score_panel(matrices, method, selected_year, selected_level):
+        defaults = dict(zip(matrices["filenames"], default_weights(matrices["filenames"])))
+        weights = {}
+        with st.expander("⚖️ Indicator weights"):
+            st.button("Reset to defaults", on_click=reset_weights)
+            for category, entries in CATEGORIES.items():
+                st.markdown(f"**{category}**")
+                cols = st.columns(3)
+                for i, (name, filename) in enumerate(entries):
+                    label = name.strip() + (" ⇅" if filename in REVERSE_CODED else "")
+                    # Seeded through session state so the reset button can set it too
+                    st.session_state.setdefault(weight_key(filename), float(defaults[filename]))
+                    weights[filename] = cols[i % 3].slider(label, 0.0, 3.0, step=0.5, key=weight_key(filename))
+
+        weight_vector = np.array([weights[filename] for filename in matrices["filenames"]])
+        if not weight_vector.any():
+            st.warning("Give at least one indicator a weight above 0.")
+            return
+
+        start = time.perf_counter()
+        scores = composite_scores(matrices, weight_vector)
+        elapsed = time.perf_counter() - start
+        metrics.add_stage("composite score", elapsed)
+        ranked = ranked_scores(scores, selected_year, selected_level)
+        if ranked.empty:
+            st.warning("No state has enough data for these weights.")
+            return
+
+        label = "z-score" if method == "z-score" else "0–1"
+        with metrics.stage("score map figure"):
+            fig = score_map(with_abbrev(ranked, "Score"), label, f"Public Value Metric, {selected_level}, {selected_year}")
+        debug.plotly_chart(fig, "score map", width="stretch")
+        debug.dataframe(
+            ranked[["Rank", "State", "Score", "Coverage"]],
+            "ranking",
+            hide_index=True,
+            width="stretch",
+            column_config={
+                "Score": st.column_config.NumberColumn("Score", format="%.3f"),
+                "Coverage": st.column_config.ProgressColumn(
+                    "Weight with data", format="percent", min_value=0.0, max_value=1.0,
+                ),
+            },
+        )
+        st.caption(
+            f"{len(scores):,} state x level x year rows rescored in {elapsed * 1000:.2f} ms. "
+            f"States need data for at least {MIN_COVERAGE:.0%} of the total weight."
+        )
+
+    score_panel(matrices, method, selected_year, selected_level)
+
+    # --- FOOTER ---
+    st.markdown("---")
+    st.caption("M. Abdalla 2025, Demo developed by affiliates of Harvard Medical School and Massachusetts General Hospital")
@@ -0,0 +1,63 @@
+"""Composite scores on a small store: direction handling and coverage."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from lumina.composite import NORMALIZATIONS, REVERSE_CODED, composite_scores, normalize, normalized_matrices
+
+FORWARD = "volunteer/formalvolunteer"
+REVERSE = "chronic health indicators/arthritis"
+QUESTIONS = {"Volunteering": FORWARD, "Arthritis": REVERSE}
+STATES = ["Ohio", "Iowa", "Utah"]
+
+
+def store(forward, reverse, year=2021):
+    records = [
+        {"Question": question, "Year": year, "State": state, "Education Level": "College+", "Percentage": value}
+        for question, values in ((FORWARD, forward), (REVERSE, reverse))
+        for state, value in zip(STATES, values)
+    ]
+    return pd.DataFrame(records)
+
+
+def scores(store_df, method):
+    result = composite_scores(normalized_matrices(store_df, QUESTIONS, method), np.ones(len(QUESTIONS)))
+    return result.set_index("State")["Score"]
+
+
+def test_fixtures_cover_both_directions():
+    assert REVERSE in REVERSE_CODED
+    assert FORWARD not in REVERSE_CODED
+
+
+@pytest.mark.parametrize("method", NORMALIZATIONS)
+def test_reverse_coded_indicator_lowers_the_score(method):
+    # Same volunteering everywhere: the state with the least arthritis ranks first
+    result = scores(store(forward=[50, 50, 50], reverse=[10, 20, 30]), method)
+    assert result["Ohio"] > result["Iowa"] > result["Utah"]
+
+    # Only Iowa's arthritis rises, and Iowa's score falls
+    baseline = scores(store(forward=[50, 40, 60], reverse=[10, 20, 30]), method)
+    result = scores(store(forward=[50, 40, 60], reverse=[10, 25, 30]), method)
+    assert result["Iowa"] < baseline["Iowa"]
+
+
+@pytest.mark.parametrize("method", NORMALIZATIONS)
+def test_forward_indicator_raises_the_score(method):
+    result = scores(store(forward=[40, 50, 60], reverse=[20, 20, 30]), method)
+    assert result["Iowa"] > result["Ohio"]
+
+
+def test_normalize_reverses_within_each_group():
+    values = np.array([[1.0, 1.0], [3.0, 3.0], [10.0, 10.0], [30.0, 30.0]])
+    groups = np.array([2020, 2020, 2021, 2021])
+    normalized = normalize(values, groups, "min-max", np.array([False, True]))
+    np.testing.assert_array_equal(normalized, [[0, 1], [1, 0], [0, 1], [1, 0]])
+
+
+def test_rows_below_min_coverage_are_not_scored():
+    store_df = store(forward=[50, 40, 60], reverse=[10, 20, np.nan])
+    result = composite_scores(normalized_matrices(store_df, QUESTIONS, "min-max"), [1.0, 3.0])
+    utah = result.set_index("State").loc["Utah"]
+    assert utah["Coverage"] == pytest.approx(0.25)
+    assert np.isnan(utah["Score"])
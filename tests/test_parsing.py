@@ -0,0 +1,40 @@
+"""The vectorized block parser against the row-by-row one it replaced."""
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from lumina.catalog import DATA_DIR, iter_source_files
+from lumina.parsing import parse_blocked_education_df
+from lumina.store import read_source_csv
+
+SOURCE_FILES = [path for _, _, path in iter_source_files(DATA_DIR)]
+
+
+def reference_parse_blocked_education_df(raw_df):
+    # The iterrows parser the pages carried before lumina.parsing
+    records = []
+    current_state = None
+    for _, row in raw_df.iterrows():
+        if pd.isna(row["n"]) and pd.isna(row["Percentage"]):
+            current_state = row["Location"].strip()
+        elif current_state and not pd.isna(row["Percentage"]):
+            records.append({
+                "State": current_state,
+                "Education Level": row["Location"],
+                "n": row["n"],
+                "Percentage": row["Percentage"],
+                "CI": row["95% CI"]
+            })
+    return pd.DataFrame(records)
+
+
+def test_source_files_are_found():
+    # Guards against an empty parametrization passing silently
+    assert SOURCE_FILES
+
+
+@pytest.mark.parametrize("read", [pd.read_csv, read_source_csv], ids=["read_csv", "read_source_csv"])
+@pytest.mark.parametrize("path", SOURCE_FILES, ids=lambda path: path.relative_to(DATA_DIR).as_posix())
+def test_matches_reference_parser(path, read):
+    raw = read(path)
+    assert_frame_equal(parse_blocked_education_df(raw), reference_parse_blocked_education_df(raw))
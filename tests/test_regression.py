@@ -0,0 +1,46 @@
+"""The batched WLS fits against statsmodels, one view at a time."""
+import numpy as np
+import pytest
+
+from lumina.catalog import QUESTION_TO_FILENAME
+from lumina.regression import (
+    INCOME_COVARIATES, WEIGHTINGS, indicator_wls, observation_weights, regression_frame, single_wls,
+)
+from lumina.store import load_store
+
+VIEW = ["Year", "Education Group", "Indicator"]
+
+
+@pytest.fixture(scope="module")
+def store_df():
+    df, _ = load_store()
+    return df
+
+
+def test_observation_weights_rejects_unknown_weighting():
+    with pytest.raises(ValueError):
+        observation_weights(None, "median")
+
+
+@pytest.mark.parametrize("covariates", [(), (next(iter(INCOME_COVARIATES)),)], ids=["plain", "income"])
+@pytest.mark.parametrize("robust", [True, False], ids=["hc1", "nonrobust"])
+@pytest.mark.parametrize("weighting", list(WEIGHTINGS.values()), ids=list(WEIGHTINGS))
+def test_matches_statsmodels(store_df, weighting, robust, covariates):
+    coefficients, fits = indicator_wls(store_df, QUESTION_TO_FILENAME, weighting, covariates, robust)
+    pairs = regression_frame(store_df, QUESTION_TO_FILENAME, covariates)
+    coefficients = coefficients.set_index(VIEW + ["term"])
+    fits = fits.set_index(VIEW)
+
+    checked = 0
+    for key, view in pairs.groupby(VIEW, sort=True, observed=True):
+        if not np.isfinite(fits.loc[key, "r2"]):
+            continue
+        result = single_wls(view, weighting, covariates, robust)
+        terms = coefficients.loc[key].rename(index={"Intercept": "const"}).loc[result.params.index]
+        np.testing.assert_allclose(terms["coef"], result.params, rtol=1e-8, atol=1e-10)
+        np.testing.assert_allclose(terms["std_err"], result.bse, rtol=1e-8, atol=1e-10)
+        np.testing.assert_allclose(terms["p_value"], result.pvalues, rtol=1e-6, atol=1e-10)
+        np.testing.assert_allclose(fits.loc[key, ["r2", "adj_r2"]].to_numpy(dtype="float64"),
+                                   [result.rsquared, result.rsquared_adj], rtol=1e-8, atol=1e-10)
+        checked += 1
+    assert checked > 300
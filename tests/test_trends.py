@@ -0,0 +1,47 @@
+"""The masked least-squares trends against a per-series fit."""
+import numpy as np
+import pytest
+from scipy import stats
+
+from lumina.trends import fit_trends
+
+YEARS = [2019, 2020, 2021, 2022, 2023]
+
+
+@pytest.fixture
+def values():
+    rng = np.random.default_rng(0)
+    values = 40 + rng.normal(0, 5, (200, len(YEARS))) + np.arange(len(YEARS)) * rng.normal(0, 1, (200, 1))
+    # Random gaps, including series left with one year or none
+    values[rng.random(values.shape) < 0.3] = np.nan
+    values[0] = np.nan
+    values[1, 1:] = np.nan
+    return values
+
+
+def test_matches_polyfit_with_missing_years(values):
+    fits = fit_trends(values, YEARS)
+    t = np.asarray(YEARS, dtype="float64") - YEARS[0]
+    fitted = 0
+    for row, fit in zip(values, fits.itertuples()):
+        observed = ~np.isnan(row)
+        assert fit.n_years == observed.sum()
+        if observed.sum() < 2:
+            assert np.isnan(fit.slope)
+            continue
+        slope, intercept = np.polyfit(t[observed], row[observed], 1)
+        assert fit.slope == pytest.approx(slope, abs=1e-9)
+        assert fit.intercept == pytest.approx(intercept, abs=1e-9)
+        if observed.sum() > 2:
+            reference = stats.linregress(t[observed], row[observed])
+            assert fit.r2 == pytest.approx(reference.rvalue ** 2, abs=1e-9)
+            assert fit.p_value == pytest.approx(reference.pvalue, abs=1e-9)
+        fitted += 1
+    assert fitted > 150
+
+
+def test_exact_line():
+    fits = fit_trends(np.array([[10.0, np.nan, 14.0, 16.0, np.nan]]), YEARS)
+    assert fits.loc[0, "slope"] == pytest.approx(2.0)
+    assert fits.loc[0, "intercept"] == pytest.approx(10.0)
+    assert fits.loc[0, "r2"] == pytest.approx(1.0)